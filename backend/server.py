@@ -1,20 +1,28 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 from motor.motor_asyncio import AsyncIOMotorClient
 from pydantic import BaseModel
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
 from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import os
 import numpy as np
 from sklearn.preprocessing import StandardScaler
 import json
 import uuid
 import asyncio
+import logging
+import struct
+from collections import deque
+from contextlib import asynccontextmanager
+import zlib
 from enum import Enum
 
 # Initialize FastAPI
 app = FastAPI(title="AI Cyber Defense Framework API")
+logger = logging.getLogger(__name__)
 
 # CORS Configuration
 app.add_middleware(
@@ -38,7 +46,36 @@ scenarios_collection = db["scenarios"]
 metrics_collection = db["metrics"]
 ml_config_collection = db["ml_config"]
 vehicles_collection = db["vehicles"]
-system_data_collection = db["system_data"]
+telemetry_buckets_collection = db["telemetry_buckets"]
+backtests_collection = db["backtests"]
+telemetry_dead_letter_collection = db["telemetry_dead_letter"]
+
+# Per-frame telemetry from before bucketed storage, drained into telemetry_buckets at startup
+legacy_telemetry_collection = db["system_data"]
+
+# Telemetry Storage Configuration
+TELEMETRY_BUCKET_SECONDS = int(os.getenv("TELEMETRY_BUCKET_SECONDS", "600"))
+TELEMETRY_FLUSH_INTERVAL = float(os.getenv("TELEMETRY_FLUSH_INTERVAL", "1.0"))
+TELEMETRY_FLUSH_ROWS = int(os.getenv("TELEMETRY_FLUSH_ROWS", "500"))
+TELEMETRY_COMPRESSION = os.getenv("TELEMETRY_COMPRESSION", "zlib")
+TELEMETRY_COMPRESS_MIN_ROWS = int(os.getenv("TELEMETRY_COMPRESS_MIN_ROWS", "64"))
+TELEMETRY_COMPACT_DELAY = int(os.getenv("TELEMETRY_COMPACT_DELAY", "60"))
+TELEMETRY_MAX_ATTEMPTS = int(os.getenv("TELEMETRY_MAX_ATTEMPTS", "5"))
+TELEMETRY_MAX_PENDING_ROWS = int(os.getenv("TELEMETRY_MAX_PENDING_ROWS", "100000"))
+
+# Hot Cache Configuration
+HOT_THREATS_CAPACITY = int(os.getenv("HOT_THREATS_CAPACITY", "1000"))
+HOT_LOGS_CAPACITY = int(os.getenv("HOT_LOGS_CAPACITY", "1000"))
+
+# Ingest Admission Configuration
+INGEST_MAX_CONCURRENCY = int(os.getenv("INGEST_MAX_CONCURRENCY", "64"))
+INGEST_MAX_VEHICLE_CONCURRENCY = int(os.getenv("INGEST_MAX_VEHICLE_CONCURRENCY", "4"))
+INGEST_MAX_QUEUE = int(os.getenv("INGEST_MAX_QUEUE", "256"))
+INGEST_DOWNSAMPLE_DEPTH = int(os.getenv("INGEST_DOWNSAMPLE_DEPTH", "128"))
+INGEST_DOWNSAMPLE_KEEP = int(os.getenv("INGEST_DOWNSAMPLE_KEEP", "4"))
+INGEST_RETRY_AFTER = int(os.getenv("INGEST_RETRY_AFTER", "1"))
+INGEST_MAX_PRIORITY_CONCURRENCY = int(os.getenv("INGEST_MAX_PRIORITY_CONCURRENCY", "16"))
+INGEST_MAX_PRIORITY_QUEUE = int(os.getenv("INGEST_MAX_PRIORITY_QUEUE", "64"))
 
 # Enums
 class ThreatType(str, Enum):
@@ -59,6 +96,12 @@ class SystemStatus(str, Enum):
     FAILOVER_ACTIVE = "FAILOVER_ACTIVE"
     RECOVERING = "RECOVERING"
 
+class BacktestStatus(str, Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
 # Pydantic Models
 class GPSData(BaseModel):
     latitude: float
@@ -112,6 +155,17 @@ class MLConfiguration(BaseModel):
     auto_response_enabled: bool = True
     updated_at: datetime
 
+class BacktestRequest(BaseModel):
+    anomaly_thresholds: List[float] = [1.5, 2.0, 2.5, 3.0, 3.5, 4.0]
+    gps_speed_thresholds: List[float] = [25.0, 50.0, 75.0, 100.0]
+    vehicle_id: Optional[str] = None
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    scenario_ids: Optional[List[str]] = None
+    attack_frames_per_scenario: int = 200
+    seed: int = 0
+    chunk_rows: int = 50000
+
 class SystemLog(BaseModel):
     log_id: str
     timestamp: datetime
@@ -127,12 +181,17 @@ class Vehicle(BaseModel):
     last_seen: datetime
     location: Optional[GPSData] = None
 
+# Control sources allowed to issue commands
+AUTHORIZED_CONTROL_SOURCES = ["GROUND_CONTROL", "ONBOARD_AI", "EMERGENCY_OVERRIDE"]
+
 # Anomaly Detector Class
 class AnomalyDetector:
     def __init__(self):
         self.baseline_mean = None
         self.baseline_std = None
         self.threshold = 2.5
+        self.gps_speed_threshold = 50.0
+        self.previous_gps: Dict[str, GPSData] = {}
         self.scaler = StandardScaler()
         
     async def set_baseline(self, normal_data: List[List[float]]):
@@ -160,6 +219,17 @@ class AnomalyDetector:
             }
         }
     
+    MAX_TRACKED_VEHICLES = 10000
+
+    def swap_previous_gps(self, vehicle_id: str, gps_data: GPSData) -> Optional[GPSData]:
+        """Remember a vehicle's latest GPS reading and return the one before it"""
+        previous = self.previous_gps.pop(vehicle_id, None)
+        self.previous_gps[vehicle_id] = gps_data
+        if len(self.previous_gps) > self.MAX_TRACKED_VEHICLES:
+            # Forget the vehicle that reported least recently
+            del self.previous_gps[next(iter(self.previous_gps))]
+        return previous
+    
     async def detect_gps_spoofing(self, gps_data: GPSData, previous_gps: Optional[GPSData] = None) -> Dict[str, Any]:
         """Detect GPS spoofing patterns"""
         # Check for impossible altitude
@@ -186,6 +256,14 @@ class AnomalyDetector:
                 "severity": SeverityLevel.HIGH
             }
         
+        # Check for an impossible speed change since the previous frame
+        if previous_gps is not None and abs(gps_data.speed - previous_gps.speed) > self.gps_speed_threshold:
+            return {
+                "is_spoofed": True,
+                "reason": "Impossible speed change detected",
+                "severity": SeverityLevel.HIGH
+            }
+        
         return {"is_spoofed": False}
     
     async def detect_control_hijacking(self, control_data: ControlData) -> Dict[str, Any]:
@@ -200,8 +278,7 @@ class AnomalyDetector:
             }
         
         # Check for authorized sources
-        authorized_sources = ["GROUND_CONTROL", "ONBOARD_AI", "EMERGENCY_OVERRIDE"]
-        if control_data.source not in authorized_sources:
+        if control_data.source not in AUTHORIZED_CONTROL_SOURCES:
             return {
                 "is_hijacked": True,
                 "reason": "Unauthorized command source",
@@ -213,6 +290,1118 @@ class AnomalyDetector:
 # Global detector instance
 detector = AnomalyDetector()
 
+# Columnar Telemetry Storage
+EPOCH = datetime(1970, 1, 1)
+
+# Column name -> little-endian NumPy dtype of the stored array
+TELEMETRY_COLUMNS = {
+    "timestamp": "<f8",            # Seconds since the Unix epoch (UTC)
+    "gps_latitude": "<f8",
+    "gps_longitude": "<f8",
+    "gps_altitude": "<f8",
+    "gps_speed": "<f8",
+    "sensor_temperature": "<f8",
+    "sensor_pressure": "<f8",
+    "sensor_humidity": "<f8",
+    "sensor_voltage": "<f8",
+    "sensor_current": "<f8",
+    "control_command_sum": "<i8",
+    "control_checksum": "<i8",
+    "control_source": "<i1",       # Index into AUTHORIZED_CONTROL_SOURCES, -1 if unauthorized
+    "threats_detected": "<i2",
+}
+
+def to_epoch_seconds(timestamp: datetime) -> float:
+    """Convert a naive-UTC or timezone-aware datetime to epoch seconds"""
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return (timestamp - EPOCH).total_seconds()
+
+def telemetry_row(data: TelemetryData, timestamp: datetime, threats_detected: int) -> Dict[str, Any]:
+    """Flatten a telemetry frame into one value per storage column"""
+    source = data.control.source
+    return {
+        "timestamp": to_epoch_seconds(timestamp),
+        "gps_latitude": data.gps.latitude,
+        "gps_longitude": data.gps.longitude,
+        "gps_altitude": data.gps.altitude,
+        "gps_speed": data.gps.speed,
+        "sensor_temperature": data.sensors.temperature,
+        "sensor_pressure": data.sensors.pressure,
+        "sensor_humidity": data.sensors.humidity,
+        "sensor_voltage": data.sensors.voltage,
+        "sensor_current": data.sensors.current,
+        "control_command_sum": sum(data.control.commands),
+        "control_checksum": data.control.checksum,
+        "control_source": AUTHORIZED_CONTROL_SOURCES.index(source) if source in AUTHORIZED_CONTROL_SOURCES else -1,
+        "threats_detected": threats_detected,
+    }
+
+def legacy_telemetry_row(document: Dict[str, Any]) -> Dict[str, Any]:
+    """Column values of a per-frame system_data document"""
+    data = TelemetryData(
+        vehicle_id=document["vehicle_id"],
+        gps=document["gps"],
+        sensors=document["sensors"],
+        control=document["control"]
+    )
+    return telemetry_row(data, document["timestamp"], document.get("threats_detected", 0))
+
+def encode_column(values: List[Any], dtype: str, encoding: str) -> bytes:
+    """Encode a list of column values as a raw or zlib-compressed array buffer"""
+    raw = np.asarray(values, dtype=dtype).tobytes()
+    return zlib.compress(raw, 1) if encoding == "zlib" else raw
+
+def decode_column(blob: bytes, dtype: str, encoding: str) -> np.ndarray:
+    """Decode an array buffer written by encode_column"""
+    raw = zlib.decompress(blob) if encoding == "zlib" else blob
+    return np.frombuffer(raw, dtype=dtype)
+
+def decode_bucket(bucket: Dict[str, Any], columns: List[str], skip_segments=frozenset()) -> Dict[str, np.ndarray]:
+    """Concatenate the appended segments of a bucket into one array per column"""
+    segments = [segment for segment in bucket.get("segments", []) if segment.get("segment_id") not in skip_segments]
+    arrays = {}
+    for name in columns:
+        parts = [decode_column(segment["columns"][name], TELEMETRY_COLUMNS[name], segment["encoding"]) for segment in segments]
+        arrays[name] = np.concatenate(parts) if parts else np.empty(0, dtype=TELEMETRY_COLUMNS[name])
+    return arrays
+
+DUPLICATE_KEY_ERROR = 11000
+
+class TelemetryBucketWriter:
+    """Buffers telemetry rows and appends them to per-vehicle time-window buckets.
+
+    Each buffered segment gets an id when it is created, and is only pushed
+    into a bucket that does not hold that id yet, so a write whose outcome is
+    unknown can be retried without duplicating rows. Segments stay visible to
+    pending() until Mongo has confirmed them. Once a bucket has closed, its
+    segments are merged into a single column set by compact().
+    """
+
+    ENCODINGS = ("zlib", "none")
+
+    def __init__(self, bucket_seconds: int, flush_interval: float, flush_rows: int, encoding: str,
+                 compress_min_rows: int, compact_delay: int, max_attempts: int, max_pending_rows: int):
+        settings = {
+            "TELEMETRY_BUCKET_SECONDS": bucket_seconds,
+            "TELEMETRY_FLUSH_ROWS": flush_rows,
+            "TELEMETRY_MAX_ATTEMPTS": max_attempts,
+            "TELEMETRY_MAX_PENDING_ROWS": max_pending_rows
+        }
+        for name, value in settings.items():
+            if value < 1:
+                raise ValueError(f"{name} must be at least 1, got {value}")
+        if flush_interval <= 0:
+            raise ValueError(f"TELEMETRY_FLUSH_INTERVAL must be positive, got {flush_interval}")
+        if encoding not in self.ENCODINGS:
+            raise ValueError(f"TELEMETRY_COMPRESSION must be one of {self.ENCODINGS}, got {encoding!r}")
+        if compress_min_rows < 0:
+            raise ValueError(f"TELEMETRY_COMPRESS_MIN_ROWS must not be negative, got {compress_min_rows}")
+        if compact_delay < 0:
+            raise ValueError(f"TELEMETRY_COMPACT_DELAY must not be negative, got {compact_delay}")
+
+        self.bucket_seconds = bucket_seconds
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+        self.encoding = encoding
+        self.compress_min_rows = compress_min_rows
+        self.compact_delay = compact_delay
+        self.max_attempts = max_attempts
+        self.max_pending_rows = max_pending_rows
+        self.buffers: Dict[tuple, Dict[str, Any]] = {}
+        self.unconfirmed: Dict[str, Dict[str, Any]] = {}
+        self.buffered_rows = 0
+        self.unconfirmed_rows = 0
+        self.dropped_rows = 0
+        self.dead_lettered_rows = 0
+        self.flush_lock = asyncio.Lock()
+        self.flush_task = None
+        self.migrating = False
+
+    def bucket_start(self, epoch_seconds: float) -> datetime:
+        """Start of the time window containing the given epoch timestamp"""
+        seconds = int(epoch_seconds)
+        return EPOCH + timedelta(seconds=seconds - seconds % self.bucket_seconds)
+
+    def new_buffer(self, key: tuple, segment_id: Optional[str] = None) -> Dict[str, Any]:
+        """Empty segment buffer for a (vehicle_id, bucket_start) key"""
+        return {
+            "key": key,
+            "segment_id": segment_id or uuid.uuid4().hex,
+            "columns": {name: [] for name in TELEMETRY_COLUMNS},
+            "attempts": 0
+        }
+
+    def append(self, vehicle_id: str, row: Dict[str, Any]):
+        """Buffer a row, starting a background flush once enough rows are pending"""
+        if self.buffered_rows + self.unconfirmed_rows >= self.max_pending_rows:
+            self.dropped_rows += 1
+            if self.dropped_rows % 1000 == 1:
+                logger.warning("Telemetry buffer full, %d rows dropped so far", self.dropped_rows)
+            return
+
+        key = (vehicle_id, self.bucket_start(row["timestamp"]))
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            buffer = self.buffers[key] = self.new_buffer(key)
+        for name in TELEMETRY_COLUMNS:
+            buffer["columns"][name].append(row[name])
+        self.buffered_rows += 1
+
+        if self.buffered_rows >= self.flush_rows and not self.flush_lock.locked():
+            self.flush_task = asyncio.create_task(self.flush())
+
+    def pending(self, vehicle_id: str, columns: List[str]):
+        """Rows for a vehicle not yet confirmed in Mongo, and the ids of their segments"""
+        arrays = {name: [] for name in columns}
+        segment_ids = set()
+        for buffer in list(self.buffers.values()) + list(self.unconfirmed.values()):
+            if buffer["key"][0] == vehicle_id:
+                segment_ids.add(buffer["segment_id"])
+                for name in columns:
+                    arrays[name].append(np.asarray(buffer["columns"][name], dtype=TELEMETRY_COLUMNS[name]))
+        return arrays, segment_ids
+
+    def stats(self) -> Dict[str, Any]:
+        """Rows waiting to be written and rows that were lost"""
+        return {
+            "buffered_rows": self.buffered_rows,
+            "unconfirmed_rows": self.unconfirmed_rows,
+            "dropped_rows": self.dropped_rows,
+            "dead_lettered_rows": self.dead_lettered_rows,
+            "migrating": self.migrating,
+            "limits": {
+                "max_pending_rows": self.max_pending_rows,
+                "max_attempts": self.max_attempts
+            }
+        }
+
+    def encode_segment(self, columns: Dict[str, Any]) -> Dict[str, Any]:
+        """Encode column values as a bucket segment, compressing only larger segments"""
+        count = len(columns["timestamp"])
+        encoding = self.encoding if count >= self.compress_min_rows else "none"
+        return {
+            "count": count,
+            "encoding": encoding,
+            "columns": {
+                name: encode_column(values, TELEMETRY_COLUMNS[name], encoding)
+                for name, values in columns.items()
+            }
+        }
+
+    def segment(self, buffer: Dict[str, Any]) -> Dict[str, Any]:
+        """Encode a buffer as a bucket segment"""
+        return {"segment_id": buffer["segment_id"], **self.encode_segment(buffer["columns"])}
+
+    def segment_operation(self, buffer: Dict[str, Any]) -> UpdateOne:
+        """Upsert that pushes a segment into its bucket unless it is already there"""
+        vehicle_id, bucket_start = buffer["key"]
+        timestamps = buffer["columns"]["timestamp"]
+        return UpdateOne(
+            {"vehicle_id": vehicle_id, "bucket_start": bucket_start, "segments.segment_id": {"$ne": buffer["segment_id"]}},
+            {
+                "$push": {"segments": self.segment(buffer)},
+                "$inc": {"count": len(timestamps)},
+                "$min": {"first_timestamp": EPOCH + timedelta(seconds=min(timestamps))},
+                "$max": {"last_timestamp": EPOCH + timedelta(seconds=max(timestamps))},
+                "$set": {"compacted": False},
+                "$setOnInsert": {"bucket_end": bucket_start + timedelta(seconds=self.bucket_seconds)}
+            },
+            upsert=True
+        )
+
+    async def segment_written(self, buffer: Dict[str, Any]) -> bool:
+        """Whether a segment is already stored in its bucket"""
+        vehicle_id, bucket_start = buffer["key"]
+        try:
+            return await telemetry_buckets_collection.find_one(
+                {"vehicle_id": vehicle_id, "bucket_start": bucket_start, "segments.segment_id": buffer["segment_id"]},
+                {"_id": 1}
+            ) is not None
+        except Exception:
+            return False
+
+    async def write_segments(self, batch: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Push segments into their buckets, returning the error of every segment not written"""
+        try:
+            await telemetry_buckets_collection.bulk_write(
+                [self.segment_operation(buffer) for buffer in batch],
+                ordered=False
+            )
+            return {}
+        except BulkWriteError as exc:
+            failed = {}
+            for error in exc.details.get("writeErrors", []):
+                buffer = batch[error["index"]]
+                # The upsert filter misses a bucket that already holds the segment
+                if error.get("code") == DUPLICATE_KEY_ERROR and await self.segment_written(buffer):
+                    continue
+                failed[buffer["segment_id"]] = error.get("errmsg", str(error))
+            return failed
+        except Exception as exc:
+            # The outcome is unknown, but segment ids make the retry safe
+            return {buffer["segment_id"]: str(exc) for buffer in batch}
+
+    async def dead_letter(self, buffer: Dict[str, Any], error: str):
+        """Move a segment that keeps failing out of the write path"""
+        count = len(buffer["columns"]["timestamp"])
+        self.dead_lettered_rows += count
+        logger.error("Telemetry segment %s for %s failed %d times: %s",
+                     buffer["segment_id"], buffer["key"], buffer["attempts"], error)
+        try:
+            await telemetry_dead_letter_collection.insert_one({
+                "vehicle_id": buffer["key"][0],
+                "bucket_start": buffer["key"][1],
+                "segment": self.segment(buffer),
+                "error": error,
+                "failed_at": datetime.utcnow()
+            })
+        except Exception:
+            logger.exception("Dropped %d telemetry rows that could not be dead-lettered", count)
+
+    async def flush(self):
+        """Write buffered and previously failed segments; never raises"""
+        async with self.flush_lock:
+            for buffer in self.buffers.values():
+                self.unconfirmed[buffer["segment_id"]] = buffer
+            self.buffers = {}
+            self.unconfirmed_rows += self.buffered_rows
+            self.buffered_rows = 0
+            if not self.unconfirmed:
+                return
+
+            batch = list(self.unconfirmed.values())
+            failed = await self.write_segments(batch)
+            if failed:
+                logger.warning("Telemetry flush failed for %d of %d segments", len(failed), len(batch))
+
+            for buffer in batch:
+                segment_id = buffer["segment_id"]
+                if segment_id in failed:
+                    buffer["attempts"] += 1
+                    if buffer["attempts"] < self.max_attempts:
+                        continue
+                    if not await self.segment_written(buffer):
+                        await self.dead_letter(buffer, failed[segment_id])
+                del self.unconfirmed[segment_id]
+                self.unconfirmed_rows -= len(buffer["columns"]["timestamp"])
+
+    async def migrate_legacy(self, batch_size: int = 5000):
+        """Move per-frame system_data documents into bucket segments.
+
+        Legacy segments get ids derived from their first document, and the
+        documents are deleted once their segment is written, so a migration
+        interrupted by a crash resumes without duplicating rows. Compaction,
+        which drops segment ids, stays off until the migration completes.
+        """
+        self.migrating = True
+        migrated = 0
+        last_id = None
+        while True:
+            query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+            try:
+                documents = await legacy_telemetry_collection.find(query).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+            except Exception:
+                logger.exception("Legacy telemetry migration stopped after %d documents; it resumes on restart", migrated)
+                return
+            if not documents:
+                break
+            last_id = documents[-1]["_id"]
+
+            buffers: Dict[tuple, Dict[str, Any]] = {}
+            document_ids: Dict[str, List[Any]] = {}
+            for document in documents:
+                try:
+                    row = legacy_telemetry_row(document)
+                except Exception:
+                    logger.warning("Skipping malformed system_data document %s", document["_id"])
+                    continue
+                key = (document["vehicle_id"], self.bucket_start(row["timestamp"]))
+                if key not in buffers:
+                    buffers[key] = self.new_buffer(key, f"legacy-{document['_id']}")
+                    document_ids[buffers[key]["segment_id"]] = []
+                for name in TELEMETRY_COLUMNS:
+                    buffers[key]["columns"][name].append(row[name])
+                document_ids[buffers[key]["segment_id"]].append(document["_id"])
+
+            batch = list(buffers.values())
+            for attempt in range(self.max_attempts):
+                failed = await self.write_segments(batch) if batch else {}
+                written = [segment_id for segment_id in document_ids if segment_id not in failed]
+                try:
+                    await legacy_telemetry_collection.delete_many(
+                        {"_id": {"$in": [document_id for segment_id in written for document_id in document_ids[segment_id]]}}
+                    )
+                except Exception:
+                    logger.exception("Legacy telemetry migration stopped after %d documents; it resumes on restart", migrated)
+                    return
+                migrated += sum(len(document_ids.pop(segment_id)) for segment_id in written)
+                batch = [buffer for buffer in batch if buffer["segment_id"] in failed]
+                if not batch:
+                    break
+                await asyncio.sleep(self.flush_interval)
+            else:
+                logger.error("Legacy telemetry migration stopped after %d documents; it resumes on restart", migrated)
+                return
+
+        if migrated:
+            logger.info("Migrated %d system_data documents into telemetry buckets", migrated)
+        self.migrating = False
+
+    async def compact(self, now: datetime, limit: int = 20):
+        """Merge the segments of closed buckets into one column set each"""
+        if self.migrating:
+            return
+        held = {buffer["key"] for buffer in list(self.buffers.values()) + list(self.unconfirmed.values())}
+        cursor = telemetry_buckets_collection.find({
+            "compacted": False,
+            "bucket_end": {"$lte": now - timedelta(seconds=self.compact_delay)}
+        }).limit(limit)
+        async for bucket in cursor:
+            # Rows of this bucket may still be written by this process
+            if (bucket["vehicle_id"], bucket["bucket_start"]) in held:
+                continue
+
+            arrays = decode_bucket(bucket, list(TELEMETRY_COLUMNS))
+            order = np.argsort(arrays["timestamp"], kind="stable")
+            merged = self.encode_segment({name: values[order] for name, values in arrays.items()})
+
+            # The count guard skips buckets that received a segment since they were read
+            await telemetry_buckets_collection.update_one(
+                {"_id": bucket["_id"], "count": bucket["count"]},
+                {"$set": {"segments": [merged], "compacted": True}}
+            )
+
+# Global telemetry writer instance
+telemetry_writer = TelemetryBucketWriter(
+    TELEMETRY_BUCKET_SECONDS,
+    TELEMETRY_FLUSH_INTERVAL,
+    TELEMETRY_FLUSH_ROWS,
+    TELEMETRY_COMPRESSION,
+    TELEMETRY_COMPRESS_MIN_ROWS,
+    TELEMETRY_COMPACT_DELAY,
+    TELEMETRY_MAX_ATTEMPTS,
+    TELEMETRY_MAX_PENDING_ROWS
+)
+
+async def telemetry_flush_loop():
+    """Periodically flush buffered telemetry to the bucket collection"""
+    while True:
+        await asyncio.sleep(telemetry_writer.flush_interval)
+        try:
+            await telemetry_writer.flush()
+            await telemetry_writer.compact(datetime.utcnow())
+        except Exception:
+            logger.exception("Telemetry flush loop error")
+
+async def load_telemetry_columns(vehicle_id: str, start: datetime, end: datetime, columns: List[str]) -> Dict[str, np.ndarray]:
+    """Load contiguous, time-ordered column arrays for a vehicle and time range"""
+    start_seconds = to_epoch_seconds(start)
+    end_seconds = to_epoch_seconds(end)
+    names = list(dict.fromkeys(["timestamp"] + columns))
+
+    # Snapshot unconfirmed rows first so segments written meanwhile are not read twice
+    pending, pending_segments = telemetry_writer.pending(vehicle_id, names)
+
+    parts = {name: [] for name in names}
+    cursor = telemetry_buckets_collection.find(
+        {
+            "vehicle_id": vehicle_id,
+            "bucket_start": {"$lt": EPOCH + timedelta(seconds=end_seconds)},
+            "bucket_end": {"$gt": EPOCH + timedelta(seconds=start_seconds)}
+        },
+        {"segments": 1}
+    ).sort("bucket_start", 1)
+    async for bucket in cursor:
+        for name, values in decode_bucket(bucket, names, pending_segments).items():
+            parts[name].append(values)
+    for name, values in pending.items():
+        parts[name].extend(values)
+
+    arrays = {
+        name: np.concatenate(values) if values else np.empty(0, dtype=TELEMETRY_COLUMNS[name])
+        for name, values in parts.items()
+    }
+
+    timestamps = arrays["timestamp"]
+    order = np.argsort(timestamps, kind="stable")
+    ordered = timestamps[order]
+    selection = order[(ordered >= start_seconds) & (ordered < end_seconds)]
+    return {name: arrays[name][selection] for name in columns}
+
+def pack_columns(arrays: Dict[str, np.ndarray]) -> bytes:
+    """Pack column arrays into one buffer readable with np.frombuffer.
+
+    Layout: a little-endian uint32 header length, a JSON header, then each
+    column body padded to 8 bytes. Column offsets in the header are relative
+    to the first byte after the padded header.
+    """
+    schema = []
+    offset = 0
+    for name, values in arrays.items():
+        schema.append({"name": name, "dtype": values.dtype.str, "offset": offset, "length": len(values)})
+        offset += -(-values.nbytes // 8) * 8
+
+    rows = len(next(iter(arrays.values()))) if arrays else 0
+    header = json.dumps({"rows": rows, "columns": schema}).encode()
+    header += b" " * (-(4 + len(header)) % 8)
+
+    chunks = [struct.pack("<I", len(header)), header]
+    for values in arrays.values():
+        body = np.ascontiguousarray(values).tobytes()
+        chunks.append(body + b"\0" * (-len(body) % 8))
+    return b"".join(chunks)
+
+# Hot Cache of Recent Threats and Logs
+def normalize_document(value: Any) -> Any:
+    """Convert a value to the form MongoDB returns it in"""
+    if isinstance(value, dict):
+        return {key: normalize_document(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_document(item) for item in value]
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        # BSON dates are naive UTC with millisecond precision
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.replace(microsecond=value.microsecond // 1000 * 1000)
+    return value
+
+class HotTier:
+    """Bounded, time-ordered ring buffer of the most recent documents of a collection"""
+
+    def __init__(self, capacity: int, time_field: str, id_field: str):
+        if capacity < 1:
+            raise ValueError(f"Hot tier capacity must be at least 1, got {capacity}")
+        self.capacity = capacity
+        self.time_field = time_field
+        self.id_field = id_field
+        self.entries: deque = deque()
+        self.index: Dict[str, Dict[str, Any]] = {}
+        self.ready = False
+        self.complete = False  # True while every document of the collection is held
+
+    async def warm(self, collection):
+        """Load the most recent documents from Mongo"""
+        documents = await collection.find({}).sort(self.time_field, -1).limit(self.capacity).to_list(length=self.capacity)
+        self.entries.clear()
+        self.index.clear()
+        self.complete = True
+        for document in reversed(documents):
+            self.add(document)
+        self.complete = len(documents) < self.capacity
+        self.ready = True
+
+    def add(self, document: Dict[str, Any]):
+        """Insert a newly written document, evicting the oldest when full"""
+        document = normalize_document(document)
+        if len(self.entries) >= self.capacity:
+            evicted = self.entries.popleft()
+            self.index.pop(evicted[self.id_field], None)
+            self.complete = False
+
+        # Keep time order when concurrent writers append slightly out of order
+        self.entries.append(document)
+        position = len(self.entries) - 1
+        while position > 0 and self.entries[position - 1][self.time_field] > document[self.time_field]:
+            self.entries[position] = self.entries[position - 1]
+            position -= 1
+        self.entries[position] = document
+        self.index[document[self.id_field]] = document
+
+    def update(self, document_id: str, fields: Dict[str, Any]):
+        """Apply an in-place update to a held document"""
+        if document_id in self.index:
+            self.index[document_id].update(normalize_document(fields))
+
+    def covers(self, since: datetime) -> bool:
+        """Whether every document newer than since is held"""
+        if not self.ready:
+            return False
+        return self.complete or (bool(self.entries) and self.entries[0][self.time_field] <= since)
+
+    def recent(self, limit: int, match=None) -> Optional[List[Dict[str, Any]]]:
+        """Newest matching documents, or None when older data is needed from Mongo"""
+        if not self.ready:
+            return None
+
+        documents = []
+        for document in reversed(self.entries):
+            if len(documents) >= limit:
+                break
+            if match is None or match(document):
+                documents.append(dict(document))
+
+        if len(documents) < limit and not self.complete:
+            return None
+        return documents
+
+    def since(self, since: datetime, match=None) -> List[Dict[str, Any]]:
+        """Matching documents at or after since, newest first"""
+        documents = []
+        for document in reversed(self.entries):
+            if document[self.time_field] < since:
+                break
+            if match is None or match(document):
+                documents.append(document)
+        return documents
+
+# Global hot tier instances
+hot_threats = HotTier(HOT_THREATS_CAPACITY, "detected_at", "threat_id")
+hot_logs = HotTier(HOT_LOGS_CAPACITY, "timestamp", "log_id")
+
+async def insert_threats(threats: List[Dict[str, Any]]):
+    """Persist threats and add them to the hot tier"""
+    documents = [dict(threat) for threat in threats]
+    await threats_collection.insert_many(documents)
+    for document in documents:
+        hot_threats.add(document)
+
+async def insert_log(log: Dict[str, Any]):
+    """Persist a log entry and add it to the hot tier"""
+    await logs_collection.insert_one(log)
+    hot_logs.add(log)
+
+# Configuration Backtesting
+BACKTEST_MAX_PAIRS = 4096
+BACKTEST_MAX_CHUNK_ROWS = 1000000
+BACKTEST_MAX_ATTACK_FRAMES = 1000000  # Across all scenarios of one backtest
+BACKTEST_SENSOR_COLUMNS = ["sensor_temperature", "sensor_pressure", "sensor_humidity", "sensor_voltage", "sensor_current"]
+BACKTEST_COLUMNS = ["timestamp", "gps_latitude", "gps_longitude", "gps_altitude", "gps_speed",
+                    "control_command_sum", "control_checksum", "control_source"] + BACKTEST_SENSOR_COLUMNS
+
+# Normal operating point that synthetic attack frames are derived from
+SYNTHETIC_GPS = {"latitude": 37.7749, "longitude": -122.4194, "altitude": 120.0, "speed": 15.0}
+SCENARIO_GPS_PARAMETERS = ["latitude", "longitude", "altitude", "speed"]
+
+def parameter_samples(value: Any, count: int, rng: np.random.Generator) -> Optional[np.ndarray]:
+    """Per-frame values of a parameter given as a number or a [low, high] range"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return np.full(count, float(value))
+    if isinstance(value, list) and len(value) == 2 \
+            and all(isinstance(bound, (int, float)) and not isinstance(bound, bool) for bound in value):
+        return rng.uniform(min(value), max(value), count)
+    return None
+
+def scenario_attack_frames(scenario: Dict[str, Any], count: int, rng: np.random.Generator):
+    """Synthetic attack frames built from a scenario's parameters.
+
+    Returns the column arrays and the speed of the frame before each one, or
+    None when no parameter changes a frame. GPS parameters replace readings,
+    "speed_jump" changes speed from the previous frame, "source" and
+    "invalid_checksum" tamper with commands, "corrupted_values",
+    "sensor_corruption"/"corruption_level" and "deviation_factor" corrupt
+    sensor readings relative to the detector baseline, and "deviation_sigma"
+    moves one sensor that many baseline standard deviations. "speed_jump" and
+    "deviation_sigma" take a number or a [low, high] range.
+    """
+    parameters = scenario.get("parameters") or {}
+    
+    # Normal operation around the detector baseline
+    sensors = rng.normal(detector.baseline_mean, detector.baseline_std, size=(count, len(BACKTEST_SENSOR_COLUMNS)))
+    columns = {
+        "gps_latitude": SYNTHETIC_GPS["latitude"] + rng.normal(0, 1e-3, count),
+        "gps_longitude": SYNTHETIC_GPS["longitude"] + rng.normal(0, 1e-3, count),
+        "gps_altitude": SYNTHETIC_GPS["altitude"] + rng.normal(0, 5, count),
+        "gps_speed": SYNTHETIC_GPS["speed"] + rng.normal(0, 2, count),
+        "control_command_sum": rng.integers(0, 1024, count),
+        "control_source": np.zeros(count, dtype=np.int8)
+    }
+    columns["control_checksum"] = columns["control_command_sum"] % 256
+    previous_speed = columns["gps_speed"] + rng.normal(0, 1, count)
+    modified = False
+    
+    for name in SCENARIO_GPS_PARAMETERS:
+        if isinstance(parameters.get(name), (int, float)):
+            columns[f"gps_{name}"] = np.full(count, float(parameters[name]))
+            modified = True
+    
+    speed_jump = parameter_samples(parameters.get("speed_jump"), count, rng)
+    if speed_jump is not None:
+        columns["gps_speed"] = previous_speed + speed_jump
+        modified = True
+    
+    if isinstance(parameters.get("source"), str):
+        source = parameters["source"]
+        columns["control_source"][:] = AUTHORIZED_CONTROL_SOURCES.index(source) if source in AUTHORIZED_CONTROL_SOURCES else -1
+        modified = modified or source not in AUTHORIZED_CONTROL_SOURCES
+    if parameters.get("invalid_checksum"):
+        columns["control_checksum"] = (columns["control_checksum"] + 1) % 256
+        modified = True
+    
+    corrupted_values = parameters.get("corrupted_values")
+    if isinstance(corrupted_values, list) and len(corrupted_values) == len(BACKTEST_SENSOR_COLUMNS):
+        sensors[:] = np.array(corrupted_values, dtype=float)
+        modified = True
+    elif parameters.get("sensor_corruption"):
+        level = float(parameters.get("corruption_level", 1.0))
+        signs = rng.choice([-1.0, 1.0], size=sensors.shape)
+        sensors = detector.baseline_mean * (1 + level * signs)
+        modified = True
+    if isinstance(parameters.get("deviation_factor"), (int, float)):
+        # Push one sensor per frame away from its nominal value
+        sensor = rng.integers(0, len(BACKTEST_SENSOR_COLUMNS), count)
+        signs = rng.choice([-1.0, 1.0], size=count)
+        rows = np.arange(count)
+        sensors[rows, sensor] = detector.baseline_mean[sensor] * (1 + parameters["deviation_factor"] * signs)
+        modified = True
+    deviation_sigma = parameter_samples(parameters.get("deviation_sigma"), count, rng)
+    if deviation_sigma is not None:
+        sensor = rng.integers(0, len(BACKTEST_SENSOR_COLUMNS), count)
+        signs = rng.choice([-1.0, 1.0], size=count)
+        rows = np.arange(count)
+        sensors[rows, sensor] = detector.baseline_mean[sensor] + signs * deviation_sigma * detector.baseline_std[sensor]
+        modified = True
+    
+    if not modified:
+        return None
+    for index, name in enumerate(BACKTEST_SENSOR_COLUMNS):
+        columns[name] = sensors[:, index]
+    return columns, previous_speed
+
+def detector_features(arrays: Dict[str, np.ndarray], previous_speed: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per-row inputs of the detectors for a block of frames"""
+    # Z-score of every sensor against the detector baseline
+    sensors = np.column_stack([arrays[name] for name in BACKTEST_SENSOR_COLUMNS])
+    max_z = np.max(np.abs((sensors - detector.baseline_mean) / (detector.baseline_std + 1e-10)), axis=1)
+    
+    # Threshold-independent GPS and control integrity rules
+    speed = arrays["gps_speed"]
+    fixed = (
+        (arrays["gps_altitude"] < -500) | (arrays["gps_altitude"] > 50000)
+        | (speed > 500) | (speed < 0)
+        | ((np.abs(arrays["gps_latitude"]) < 0.1) & (np.abs(arrays["gps_longitude"]) < 0.1))
+        | (arrays["control_command_sum"] % 256 != arrays["control_checksum"])
+        | (arrays["control_source"] < 0)
+    )
+    
+    # Speed change since the previous frame, compared with gps_speed_threshold as in detect_gps_spoofing
+    return {"max_z": max_z, "speed_jump": np.abs(speed - previous_speed), "fixed": fixed}
+
+def backtest_features(vehicle_id: str, arrays: Dict[str, np.ndarray], previous_speed: Dict[str, float]) -> Dict[str, np.ndarray]:
+    """Features of one bucket of stored telemetry, labeled as normal operation"""
+    order = np.argsort(arrays["timestamp"], kind="stable")
+    arrays = {name: values[order] for name, values in arrays.items()}
+    
+    # Speed change from the previous frame of the same vehicle
+    speed = arrays["gps_speed"]
+    previous = np.concatenate([[previous_speed.get(vehicle_id, speed[0])], speed[:-1]])
+    previous_speed[vehicle_id] = float(speed[-1])
+    
+    features = detector_features(arrays, previous)
+    features["label"] = np.zeros(len(speed), dtype=bool)
+    return features
+
+def flagged_counts(max_z: np.ndarray, speed_jump: np.ndarray, anomaly_thresholds: np.ndarray,
+                   gps_speed_thresholds: np.ndarray) -> np.ndarray:
+    """Rows flagged by the anomaly or GPS speed check for every threshold pair.
+
+    Thresholds are sorted ascending. Each row is ranked by how many thresholds
+    of each kind it exceeds, and the pair counts come from a 2-D histogram of
+    those ranks, so memory does not grow with thresholds times rows.
+    """
+    anomaly_size, gps_size = len(anomaly_thresholds) + 1, len(gps_speed_thresholds) + 1
+    anomaly_rank = np.searchsorted(anomaly_thresholds, max_z, side="left")
+    gps_rank = np.searchsorted(gps_speed_thresholds, speed_jump, side="left")
+    histogram = np.bincount(anomaly_rank * gps_size + gps_rank, minlength=anomaly_size * gps_size) \
+        .reshape(anomaly_size, gps_size)
+    
+    # at_least[r, s] counts rows ranked at least r and at least s
+    at_least = histogram[::-1, ::-1].cumsum(axis=0).cumsum(axis=1)[::-1, ::-1]
+    anomaly = at_least[1:, 0]
+    gps = at_least[0, 1:]
+    both = at_least[1:, 1:]
+    return anomaly[:, None] + gps[None, :] - both
+
+def evaluate_backtest_chunk(
+    features: List[Dict[str, np.ndarray]],
+    anomaly_thresholds: np.ndarray,
+    gps_speed_thresholds: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """Confusion counts for every threshold pair over one chunk of rows"""
+    max_z = np.concatenate([f["max_z"] for f in features])
+    speed_jump = np.concatenate([f["speed_jump"] for f in features])
+    fixed = np.concatenate([f["fixed"] for f in features])
+    label = np.concatenate([f["label"] for f in features])
+    
+    flagged = {}
+    for name, rows in (("positives", label), ("negatives", ~label)):
+        checked = rows & ~fixed
+        flagged[name] = flagged_counts(max_z[checked], speed_jump[checked], anomaly_thresholds, gps_speed_thresholds) \
+            + int((rows & fixed).sum())
+    
+    return {
+        "true_positives": flagged["positives"],
+        "false_positives": flagged["negatives"],
+        "false_negatives": int(label.sum()) - flagged["positives"],
+        "true_negatives": int((~label).sum()) - flagged["negatives"]
+    }
+
+def evaluate_attack_frames(
+    scenario: Dict[str, Any],
+    count: int,
+    rng: np.random.Generator,
+    anomaly_thresholds: np.ndarray,
+    gps_speed_thresholds: np.ndarray
+) -> Optional[Dict[str, np.ndarray]]:
+    """Confusion counts for one chunk of a scenario's attack frames, or None if it produces none"""
+    frames = scenario_attack_frames(scenario, count, rng)
+    if frames is None:
+        return None
+    features = detector_features(*frames)
+    features["label"] = np.ones(count, dtype=bool)
+    return evaluate_backtest_chunk([features], anomaly_thresholds, gps_speed_thresholds)
+
+def summarize_backtest(
+    counts: Dict[str, np.ndarray],
+    anomaly_thresholds: np.ndarray,
+    gps_speed_thresholds: np.ndarray
+) -> List[Dict[str, Any]]:
+    """Precision, recall and false positive rate for every threshold pair"""
+    results = []
+    for i, anomaly_threshold in enumerate(anomaly_thresholds):
+        for j, gps_speed_threshold in enumerate(gps_speed_thresholds):
+            tp, fp, fn, tn = (int(counts[name][i, j]) for name in
+                              ("true_positives", "false_positives", "false_negatives", "true_negatives"))
+            results.append({
+                "anomaly_threshold": float(anomaly_threshold),
+                "gps_speed_threshold": float(gps_speed_threshold),
+                "true_positives": tp,
+                "false_positives": fp,
+                "false_negatives": fn,
+                "true_negatives": tn,
+                "precision": tp / (tp + fp) if tp + fp else None,
+                "recall": tp / (tp + fn) if tp + fn else None,
+                "false_positive_rate": fp / (fp + tn) if fp + tn else None
+            })
+    return results
+
+def backtest_scenario_query(request: BacktestRequest) -> Dict[str, Any]:
+    """Query for the attack scenarios a backtest synthesizes frames from"""
+    return {"scenario_id": {"$in": request.scenario_ids}} if request.scenario_ids else {}
+
+async def run_backtest(job_id: str, request: BacktestRequest):
+    """Stream stored telemetry through the detectors for every candidate threshold"""
+    try:
+        await telemetry_writer.flush()
+        
+        anomaly_thresholds = np.unique(np.array(request.anomaly_thresholds, dtype=float))
+        gps_speed_thresholds = np.unique(np.array(request.gps_speed_thresholds, dtype=float))
+        
+        query: Dict[str, Any] = {}
+        if request.vehicle_id:
+            query["vehicle_id"] = request.vehicle_id
+        if request.start:
+            query["bucket_end"] = {"$gt": EPOCH + timedelta(seconds=to_epoch_seconds(request.start))}
+        if request.end:
+            query["bucket_start"] = {"$lt": EPOCH + timedelta(seconds=to_epoch_seconds(request.end))}
+        start_seconds = to_epoch_seconds(request.start) if request.start else -np.inf
+        end_seconds = to_epoch_seconds(request.end) if request.end else np.inf
+        
+        buckets_total = await telemetry_buckets_collection.count_documents(query)
+        await backtests_collection.update_one(
+            {"job_id": job_id},
+            {"$set": {"status": BacktestStatus.RUNNING, "buckets_total": buckets_total, "started_at": datetime.utcnow()}}
+        )
+        
+        shape = (len(anomaly_thresholds), len(gps_speed_thresholds))
+        counts = {name: np.zeros(shape, dtype=np.int64) for name in
+                  ("true_positives", "false_positives", "false_negatives", "true_negatives")}
+        
+        # Labeled attacks are synthesized from the attack scenarios, one chunk at a time
+        scenarios = await scenarios_collection.find(backtest_scenario_query(request)).to_list(length=None)
+        if len(scenarios) * request.attack_frames_per_scenario > BACKTEST_MAX_ATTACK_FRAMES:
+            raise ValueError(f"At most {BACKTEST_MAX_ATTACK_FRAMES} attack frames can be generated")
+        rng = np.random.default_rng(request.seed)
+        scenario_summary = []
+        for scenario in scenarios:
+            attack_frames = 0
+            while attack_frames < request.attack_frames_per_scenario:
+                count = min(request.chunk_rows, request.attack_frames_per_scenario - attack_frames)
+                chunk_counts = await asyncio.to_thread(
+                    evaluate_attack_frames, scenario, count, rng, anomaly_thresholds, gps_speed_thresholds
+                )
+                if chunk_counts is None:
+                    break
+                for name, values in chunk_counts.items():
+                    counts[name] += values
+                attack_frames += count
+            scenario_summary.append({
+                "scenario_id": scenario["scenario_id"],
+                "name": scenario["name"],
+                "attack_frames": attack_frames
+            })
+        if not any(scenario["attack_frames"] for scenario in scenario_summary):
+            raise ValueError("No scenario parameters produce attack frames")
+        previous_speed: Dict[str, float] = {}
+        chunk: List[Dict[str, np.ndarray]] = []
+        chunk_rows = 0
+        buckets_processed = 0
+        rows_processed = 0
+        excluded_rows = 0
+        
+        async def evaluate_chunk():
+            chunk_counts = await asyncio.to_thread(evaluate_backtest_chunk, chunk, anomaly_thresholds, gps_speed_thresholds)
+            for name, values in chunk_counts.items():
+                counts[name] += values
+            await backtests_collection.update_one(
+                {"job_id": job_id},
+                {"$set": {
+                    "buckets_processed": buckets_processed,
+                    "rows_processed": rows_processed,
+                    "progress": buckets_processed / buckets_total if buckets_total else 1.0
+                }}
+            )
+        
+        cursor = telemetry_buckets_collection.find(query, {"vehicle_id": 1, "segments": 1}) \
+            .sort([("vehicle_id", ASCENDING), ("bucket_start", ASCENDING)]).batch_size(100)
+        async for bucket in cursor:
+            buckets_processed += 1
+            arrays = decode_bucket(bucket, BACKTEST_COLUMNS)
+            in_range = (arrays["timestamp"] >= start_seconds) & (arrays["timestamp"] < end_seconds)
+            if not in_range.any():
+                continue
+            
+            arrays = {name: values[in_range] for name, values in arrays.items()}
+            features = backtest_features(bucket["vehicle_id"], arrays, previous_speed)
+            
+            # Frames failing the integrity rules are not normal operation, and no label says what they are
+            excluded_rows += int(features["fixed"].sum())
+            chunk.append({name: values[~features["fixed"]] for name, values in features.items()})
+            chunk_rows += len(arrays["timestamp"])
+            rows_processed += len(arrays["timestamp"])
+            
+            if chunk_rows >= request.chunk_rows:
+                await evaluate_chunk()
+                chunk, chunk_rows = [], 0
+        
+        if chunk:
+            await evaluate_chunk()
+        
+        results = summarize_backtest(counts, anomaly_thresholds, gps_speed_thresholds)
+        await backtests_collection.update_one(
+            {"job_id": job_id},
+            {"$set": {
+                "status": BacktestStatus.COMPLETED,
+                "buckets_processed": buckets_processed,
+                "rows_processed": rows_processed,
+                "progress": 1.0,
+                "excluded_rows": excluded_rows,
+                "attack_frames": sum(scenario["attack_frames"] for scenario in scenario_summary),
+                "normal_rows": rows_processed - excluded_rows,
+                "scenarios": scenario_summary,
+                "results": results,
+                "completed_at": datetime.utcnow()
+            }}
+        )
+        
+        await insert_log({
+            "log_id": str(uuid.uuid4()),
+            "timestamp": datetime.utcnow(),
+            "level": "INFO",
+            "message": "ML configuration backtest completed",
+            "details": {"job_id": job_id, "rows_processed": rows_processed, "candidates": len(results)}
+        })
+    except Exception as exc:
+        await backtests_collection.update_one(
+            {"job_id": job_id},
+            {"$set": {"status": BacktestStatus.FAILED, "error": str(exc), "completed_at": datetime.utcnow()}}
+        )
+
+async def find_backtest_result(anomaly_threshold: float, gps_speed_threshold: float) -> Optional[Dict[str, Any]]:
+    """Figures for a threshold pair from the latest completed backtest that covered it"""
+    backtest = await backtests_collection.find_one(
+        {
+            "status": BacktestStatus.COMPLETED,
+            "results": {"$elemMatch": {
+                "anomaly_threshold": anomaly_threshold,
+                "gps_speed_threshold": gps_speed_threshold
+            }}
+        },
+        sort=[("completed_at", -1)]
+    )
+    if not backtest:
+        return None
+    
+    for result in backtest["results"]:
+        if result["anomaly_threshold"] == anomaly_threshold and result["gps_speed_threshold"] == gps_speed_threshold:
+            # Precision depends on the ratio of synthetic attack frames to stored rows, so it is reported with it
+            return {
+                "job_id": backtest["job_id"],
+                "completed_at": backtest["completed_at"].isoformat(),
+                "attack_frames": backtest["attack_frames"],
+                "normal_rows": backtest["normal_rows"],
+                **result
+            }
+
+# Ingest Admission Control
+class AdmissionPool:
+    """Processing slots with a bounded wait queue and a per-vehicle limit"""
+
+    def __init__(self, max_concurrency: int, max_queue: int, max_vehicle_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_vehicle_concurrency = max_vehicle_concurrency
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.vehicle_active: Dict[str, int] = {}
+
+    def shed_reason(self, vehicle_id: str) -> Optional[str]:
+        """Why the pool cannot take another frame, or None"""
+        if self.queue_depth >= self.max_queue:
+            return "queue_full"
+        if self.vehicle_active.get(vehicle_id, 0) >= self.max_vehicle_concurrency:
+            return "vehicle_limit"
+        return None
+
+    @asynccontextmanager
+    async def admit(self, vehicle_id: str):
+        """Hold a slot of the pool, waiting in its queue if needed"""
+        self.vehicle_active[vehicle_id] = self.vehicle_active.get(vehicle_id, 0) + 1
+        acquired = False
+        try:
+            self.queue_depth += 1
+            try:
+                await self.slots.acquire()
+                acquired = True
+            finally:
+                self.queue_depth -= 1
+
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+        finally:
+            if acquired:
+                self.slots.release()
+            self.vehicle_active[vehicle_id] -= 1
+            if not self.vehicle_active[vehicle_id]:
+                del self.vehicle_active[vehicle_id]
+
+    def stats(self) -> Dict[str, Any]:
+        """Current queue depth and concurrency of the pool"""
+        return {
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "active_vehicles": len(self.vehicle_active),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "max_vehicle_concurrency": self.max_vehicle_concurrency
+        }
+
+class AdmissionController:
+    """Bounds concurrent telemetry processing and sheds load under overload.
+
+    Frames carrying CRITICAL detections use a separate, smaller pool, so they
+    are never shed behind normal load but are still capped when a client
+    floods them.
+    """
+
+    MAX_TRACKED_VEHICLES = 10000
+
+    def __init__(self, max_concurrency: int, max_vehicle_concurrency: int, max_queue: int,
+                 downsample_depth: int, downsample_keep: int, retry_after: int,
+                 max_priority_concurrency: int, max_priority_queue: int):
+        settings = {
+            "INGEST_MAX_CONCURRENCY": max_concurrency,
+            "INGEST_MAX_VEHICLE_CONCURRENCY": max_vehicle_concurrency,
+            "INGEST_MAX_QUEUE": max_queue,
+            "INGEST_DOWNSAMPLE_DEPTH": downsample_depth,
+            "INGEST_DOWNSAMPLE_KEEP": downsample_keep,
+            "INGEST_MAX_PRIORITY_CONCURRENCY": max_priority_concurrency,
+            "INGEST_MAX_PRIORITY_QUEUE": max_priority_queue
+        }
+        for name, value in settings.items():
+            if value < 1:
+                raise ValueError(f"{name} must be at least 1, got {value}")
+        if downsample_depth > max_queue:
+            raise ValueError("INGEST_DOWNSAMPLE_DEPTH must not exceed INGEST_MAX_QUEUE")
+        if retry_after < 0:
+            raise ValueError("INGEST_RETRY_AFTER must not be negative")
+
+        self.normal = AdmissionPool(max_concurrency, max_queue, max_vehicle_concurrency)
+        self.priority = AdmissionPool(max_priority_concurrency, max_priority_queue, max_vehicle_concurrency)
+        self.downsample_depth = downsample_depth
+        self.downsample_keep = downsample_keep
+        self.retry_after = retry_after
+        self.vehicle_frames: Dict[str, int] = {}
+        self.counters = {
+            "admitted": 0,
+            "priority_admitted": 0,
+            "shed_queue_full": 0,
+            "shed_vehicle_limit": 0,
+            "shed_downsampled": 0,
+            "shed_priority_queue_full": 0,
+            "shed_priority_vehicle_limit": 0
+        }
+
+    def shed_reason(self, vehicle_id: str, priority: bool = False) -> Optional[str]:
+        """Why a frame should be dropped, or None to admit it"""
+        if priority:
+            reason = self.priority.shed_reason(vehicle_id)
+            if reason:
+                reason = f"priority_{reason}"
+        else:
+            reason = self.normal.shed_reason(vehicle_id)
+            if not reason:
+                reason = self.downsample(vehicle_id)
+
+        if reason:
+            self.counters[f"shed_{reason}"] += 1
+        return reason
+
+    def downsample(self, vehicle_id: str) -> Optional[str]:
+        """Keep one frame in every downsample_keep per vehicle while the queue is deep"""
+        if self.normal.queue_depth < self.downsample_depth:
+            self.vehicle_frames.clear()
+            return None
+        if len(self.vehicle_frames) >= self.MAX_TRACKED_VEHICLES and vehicle_id not in self.vehicle_frames:
+            self.vehicle_frames.clear()
+
+        frame = self.vehicle_frames.get(vehicle_id, 0)
+        self.vehicle_frames[vehicle_id] = frame + 1
+        return "downsampled" if frame % self.downsample_keep else None
+
+    @asynccontextmanager
+    async def admit(self, vehicle_id: str, priority: bool = False):
+        """Hold a processing slot from the pool matching the frame's priority"""
+        async with (self.priority if priority else self.normal).admit(vehicle_id):
+            self.counters["priority_admitted" if priority else "admitted"] += 1
+            yield
+
+    def stats(self) -> Dict[str, Any]:
+        """Current queue depths, concurrency and shed counts"""
+        return {
+            "queue_depth": self.normal.queue_depth,
+            "in_flight": self.normal.in_flight,
+            "active_vehicles": len(self.normal.vehicle_active),
+            "priority": self.priority.stats(),
+            "limits": {
+                "max_concurrency": self.normal.max_concurrency,
+                "max_vehicle_concurrency": self.normal.max_vehicle_concurrency,
+                "max_queue": self.normal.max_queue,
+                "downsample_depth": self.downsample_depth,
+                "downsample_keep": self.downsample_keep
+            },
+            **self.counters,
+            "shed_total": sum(count for name, count in self.counters.items() if name.startswith("shed_"))
+        }
+
+# Global admission controller instance
+admission = AdmissionController(
+    INGEST_MAX_CONCURRENCY,
+    INGEST_MAX_VEHICLE_CONCURRENCY,
+    INGEST_MAX_QUEUE,
+    INGEST_DOWNSAMPLE_DEPTH,
+    INGEST_DOWNSAMPLE_KEEP,
+    INGEST_RETRY_AFTER,
+    INGEST_MAX_PRIORITY_CONCURRENCY,
+    INGEST_MAX_PRIORITY_QUEUE
+)
+
 # Initialize baseline data on startup
 @app.on_event("startup")
 async def startup_event():
@@ -230,6 +1419,18 @@ async def startup_event():
     
     await detector.set_baseline(normal_data)
     
+    # Prepare columnar telemetry storage
+    await telemetry_buckets_collection.create_index(
+        [("vehicle_id", ASCENDING), ("bucket_start", ASCENDING)],
+        unique=True
+    )
+    await telemetry_buckets_collection.create_index(
+        [("compacted", ASCENDING), ("bucket_end", ASCENDING)]
+    )
+    telemetry_writer.migrating = True
+    app.state.telemetry_migration_task = asyncio.create_task(telemetry_writer.migrate_legacy())
+    app.state.telemetry_flush_task = asyncio.create_task(telemetry_flush_loop())
+    
     # Initialize default ML configuration if not exists
     existing_config = await ml_config_collection.find_one({})
     if not existing_config:
@@ -244,6 +1445,11 @@ async def startup_event():
         }
         await ml_config_collection.insert_one(default_config)
     
+    # Detect with the stored thresholds, which backtest figures are reported for
+    config = existing_config or default_config
+    detector.threshold = config.get("anomaly_threshold", detector.threshold)
+    detector.gps_speed_threshold = config.get("gps_speed_threshold", detector.gps_speed_threshold)
+    
     # Initialize default scenarios
     existing_scenarios = await scenarios_collection.count_documents({})
     if existing_scenarios == 0:
@@ -274,12 +1480,34 @@ async def startup_event():
                 "parameters": {"sensor_corruption": True},
                 "created_at": datetime.utcnow(),
                 "is_custom": False
+            },
+            {
+                "scenario_id": str(uuid.uuid4()),
+                "name": "Sensor Drift",
+                "description": "Simulates a sensor pushed 1 to 5 standard deviations off its baseline",
+                "threat_type": ThreatType.ANOMALY_DETECTED,
+                "parameters": {"deviation_sigma": [1.0, 5.0]},
+                "created_at": datetime.utcnow(),
+                "is_custom": False
+            },
+            {
+                "scenario_id": str(uuid.uuid4()),
+                "name": "GPS Speed Jump",
+                "description": "Simulates spoofed GPS speed changing 20 to 120 m/s between frames",
+                "threat_type": ThreatType.GPS_SPOOFING,
+                "parameters": {"speed_jump": [20.0, 120.0]},
+                "created_at": datetime.utcnow(),
+                "is_custom": False
             }
         ]
         await scenarios_collection.insert_many(default_scenarios)
     
+    # Load recent threats and logs into the hot tier
+    await hot_threats.warm(threats_collection)
+    await hot_logs.warm(logs_collection)
+    
     # Log startup
-    await logs_collection.insert_one({
+    await insert_log({
         "log_id": str(uuid.uuid4()),
         "timestamp": datetime.utcnow(),
         "level": "INFO",
@@ -287,6 +1515,13 @@ async def startup_event():
         "details": {"baseline_samples": 1000}
     })
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush buffered telemetry before the process exits"""
+    app.state.telemetry_migration_task.cancel()
+    app.state.telemetry_flush_task.cancel()
+    await telemetry_writer.flush()
+
 # API Endpoints
 
 @app.get("/api/health")
@@ -300,16 +1535,26 @@ async def health_check():
 async def get_system_status():
     """Get current system status"""
     # Get recent threats
-    recent_threats = await threats_collection.count_documents({
-        "detected_at": {"$gte": datetime.utcnow() - timedelta(minutes=5)},
-        "resolved": False
-    })
+    window_start = datetime.utcnow() - timedelta(minutes=5)
+    if hot_threats.covers(window_start):
+        recent_threats = len(hot_threats.since(window_start, lambda threat: not threat["resolved"]))
+    else:
+        recent_threats = await threats_collection.count_documents({
+            "detected_at": {"$gte": window_start},
+            "resolved": False
+        })
     
     # Determine threat level
-    critical_threats = await threats_collection.count_documents({
-        "severity": SeverityLevel.CRITICAL,
-        "resolved": False
-    })
+    if hot_threats.ready and hot_threats.complete:
+        critical_threats = len([
+            threat for threat in hot_threats.entries
+            if threat["severity"] == SeverityLevel.CRITICAL and not threat["resolved"]
+        ])
+    else:
+        critical_threats = await threats_collection.count_documents({
+            "severity": SeverityLevel.CRITICAL,
+            "resolved": False
+        })
     
     if critical_threats > 0:
         threat_level = SeverityLevel.CRITICAL
@@ -339,35 +1584,10 @@ async def process_telemetry(data: TelemetryData):
     """Process incoming telemetry data and detect threats"""
     threats_detected = []
     
-    # Convert sensor data to list for anomaly detection
-    sensor_values = [
-        data.sensors.temperature,
-        data.sensors.pressure,
-        data.sensors.humidity,
-        data.sensors.voltage,
-        data.sensors.current
-    ]
-    
-    # Check for anomalies
-    anomaly_result = await detector.detect_anomaly(sensor_values)
-    if anomaly_result["is_anomaly"]:
-        threat = {
-            "threat_id": str(uuid.uuid4()),
-            "threat_type": ThreatType.ANOMALY_DETECTED,
-            "severity": SeverityLevel.MEDIUM if anomaly_result["confidence"] < 0.8 else SeverityLevel.HIGH,
-            "confidence": anomaly_result["confidence"],
-            "detected_at": datetime.utcnow(),
-            "vehicle_id": data.vehicle_id,
-            "details": anomaly_result["details"],
-            "resolved": False
-        }
-        await threats_collection.insert_one(threat)
-        threats_detected.append(threat)
-    
-    # Check for GPS spoofing
-    gps_result = await detector.detect_gps_spoofing(data.gps)
+    # Cheap integrity checks run before admission so CRITICAL detections get the priority pool
+    gps_result = await detector.detect_gps_spoofing(data.gps, detector.swap_previous_gps(data.vehicle_id, data.gps))
     if gps_result.get("is_spoofed"):
-        threat = {
+        threats_detected.append({
             "threat_id": str(uuid.uuid4()),
             "threat_type": ThreatType.GPS_SPOOFING,
             "severity": gps_result["severity"],
@@ -376,14 +1596,11 @@ async def process_telemetry(data: TelemetryData):
             "vehicle_id": data.vehicle_id,
             "details": {"reason": gps_result["reason"], "gps_data": data.gps.dict()},
             "resolved": False
-        }
-        await threats_collection.insert_one(threat)
-        threats_detected.append(threat)
+        })
     
-    # Check for control hijacking
     control_result = await detector.detect_control_hijacking(data.control)
     if control_result.get("is_hijacked"):
-        threat = {
+        threats_detected.append({
             "threat_id": str(uuid.uuid4()),
             "threat_type": ThreatType.CONTROL_HIJACKING,
             "severity": control_result["severity"],
@@ -392,20 +1609,55 @@ async def process_telemetry(data: TelemetryData):
             "vehicle_id": data.vehicle_id,
             "details": {"reason": control_result["reason"], "control_data": data.control.dict()},
             "resolved": False
-        }
-        await threats_collection.insert_one(threat)
-        threats_detected.append(threat)
+        })
     
-    # Store telemetry
-    await system_data_collection.insert_one({
-        "data_id": str(uuid.uuid4()),
-        "vehicle_id": data.vehicle_id,
-        "timestamp": datetime.utcnow(),
-        "gps": data.gps.dict(),
-        "sensors": data.sensors.dict(),
-        "control": data.control.dict(),
-        "threats_detected": len(threats_detected)
-    })
+    priority = any(threat["severity"] == SeverityLevel.CRITICAL for threat in threats_detected)
+    reason = admission.shed_reason(data.vehicle_id, priority)
+    if reason:
+        # CRITICAL detections are recorded even when the frame is shed; only
+        # anomaly scoring and telemetry storage are skipped
+        if priority:
+            await insert_threats(threats_detected)
+        raise HTTPException(
+            status_code=429,
+            detail={"processed": False, "reason": reason, "threats_recorded": len(threats_detected) if priority else 0},
+            headers={"Retry-After": str(admission.retry_after)}
+        )
+    
+    async with admission.admit(data.vehicle_id, priority):
+        if threats_detected:
+            await insert_threats(threats_detected)
+        
+        # Convert sensor data to list for anomaly detection
+        sensor_values = [
+            data.sensors.temperature,
+            data.sensors.pressure,
+            data.sensors.humidity,
+            data.sensors.voltage,
+            data.sensors.current
+        ]
+        
+        # Check for anomalies
+        anomaly_result = await detector.detect_anomaly(sensor_values)
+        if anomaly_result["is_anomaly"]:
+            threat = {
+                "threat_id": str(uuid.uuid4()),
+                "threat_type": ThreatType.ANOMALY_DETECTED,
+                "severity": SeverityLevel.MEDIUM if anomaly_result["confidence"] < 0.8 else SeverityLevel.HIGH,
+                "confidence": anomaly_result["confidence"],
+                "detected_at": datetime.utcnow(),
+                "vehicle_id": data.vehicle_id,
+                "details": anomaly_result["details"],
+                "resolved": False
+            }
+            await insert_threats([threat])
+            threats_detected.append(threat)
+        
+        # Store telemetry
+        telemetry_writer.append(
+            data.vehicle_id,
+            telemetry_row(data, datetime.utcnow(), len(threats_detected))
+        )
     
     return {
         "processed": True,
@@ -413,6 +1665,45 @@ async def process_telemetry(data: TelemetryData):
         "threats": threats_detected
     }
 
+@app.get("/api/monitoring/admission")
+async def get_admission_stats():
+    """Get telemetry ingest queue depth and shed counts"""
+    return admission.stats()
+
+@app.get("/api/monitoring/storage")
+async def get_storage_stats():
+    """Get telemetry rows pending, dropped and dead-lettered by the bucket writer"""
+    return telemetry_writer.stats()
+
+# Telemetry Query Endpoints
+
+@app.get("/api/telemetry/{vehicle_id}")
+async def get_telemetry_columns(
+    vehicle_id: str,
+    columns: str = "timestamp,gps_speed",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    format: str = "json"
+):
+    """Get stored telemetry columns for a vehicle and time range"""
+    requested = [name.strip() for name in columns.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in TELEMETRY_COLUMNS]
+    if not requested or unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown telemetry columns: {unknown}")
+    
+    end = end or datetime.utcnow()
+    start = start or end - timedelta(hours=1)
+    arrays = await load_telemetry_columns(vehicle_id, start, end, requested)
+    
+    if format == "binary":
+        return Response(content=pack_columns(arrays), media_type="application/octet-stream")
+    
+    return {
+        "vehicle_id": vehicle_id,
+        "rows": len(arrays[requested[0]]),
+        "columns": {name: values.tolist() for name, values in arrays.items()}
+    }
+
 # Attack Simulation Endpoints
 
 @app.post("/api/attacks/simulate/{attack_type}")
@@ -464,10 +1755,10 @@ async def simulate_attack(attack_type: ThreatType, vehicle_id: str = "drone-001"
         }
     
     if threat_data:
-        result = await threats_collection.insert_one(threat_data)
+        await insert_threats([threat_data])
         
         # Log the simulation
-        await logs_collection.insert_one({
+        await insert_log({
             "log_id": str(uuid.uuid4()),
             "timestamp": datetime.utcnow(),
             "level": "WARNING",
@@ -497,7 +1788,9 @@ async def get_threats(limit: int = 50, resolved: Optional[bool] = None):
     if resolved is not None:
         query["resolved"] = resolved
     
-    threats = await threats_collection.find(query).sort("detected_at", -1).limit(limit).to_list(length=limit)
+    threats = hot_threats.recent(limit, lambda threat: resolved is None or threat["resolved"] == resolved)
+    if threats is None:
+        threats = await threats_collection.find(query).sort("detected_at", -1).limit(limit).to_list(length=limit)
     
     # Convert ObjectId to string for JSON serialization
     for threat in threats:
@@ -508,13 +1801,15 @@ async def get_threats(limit: int = 50, resolved: Optional[bool] = None):
 @app.put("/api/threats/{threat_id}/resolve")
 async def resolve_threat(threat_id: str):
     """Mark a threat as resolved"""
+    resolution = {"resolved": True, "resolved_at": datetime.utcnow()}
     result = await threats_collection.update_one(
         {"threat_id": threat_id},
-        {"$set": {"resolved": True, "resolved_at": datetime.utcnow()}}
+        {"$set": resolution}
     )
     
     if result.modified_count > 0:
-        await logs_collection.insert_one({
+        hot_threats.update(threat_id, resolution)
+        await insert_log({
             "log_id": str(uuid.uuid4()),
             "timestamp": datetime.utcnow(),
             "level": "INFO",
@@ -576,7 +1871,7 @@ async def create_scenario(scenario: AttackScenario):
     
     await scenarios_collection.insert_one(scenario_dict)
     
-    await logs_collection.insert_one({
+    await insert_log({
         "log_id": str(uuid.uuid4()),
         "timestamp": datetime.utcnow(),
         "level": "INFO",
@@ -620,8 +1915,9 @@ async def update_ml_config(config: MLConfiguration):
     config_dict = config.dict()
     config_dict["updated_at"] = datetime.utcnow()
     
-    # Update detector threshold
+    # Update detector thresholds
     detector.threshold = config.anomaly_threshold
+    detector.gps_speed_threshold = config.gps_speed_threshold
     
     await ml_config_collection.update_one(
         {},
@@ -629,7 +1925,7 @@ async def update_ml_config(config: MLConfiguration):
         upsert=True
     )
     
-    await logs_collection.insert_one({
+    await insert_log({
         "log_id": str(uuid.uuid4()),
         "timestamp": datetime.utcnow(),
         "level": "INFO",
@@ -637,7 +1933,62 @@ async def update_ml_config(config: MLConfiguration):
         "details": config_dict
     })
     
-    return {"success": True, "config": config_dict}
+    return {
+        "success": True,
+        "config": config_dict,
+        "backtest": await find_backtest_result(config.anomaly_threshold, config.gps_speed_threshold)
+    }
+
+@app.post("/api/ml-config/backtest")
+async def start_backtest(request: BacktestRequest, background_tasks: BackgroundTasks):
+    """Start a backtest of candidate thresholds against stored telemetry"""
+    # Always cover the active configuration so /api/metrics can report it
+    config = await ml_config_collection.find_one({}) or {}
+    request.anomaly_thresholds = sorted(set(request.anomaly_thresholds) | {config.get("anomaly_threshold", detector.threshold)})
+    request.gps_speed_thresholds = sorted(set(request.gps_speed_thresholds) | {config.get("gps_speed_threshold", 50.0)})
+    
+    if len(request.anomaly_thresholds) * len(request.gps_speed_thresholds) > BACKTEST_MAX_PAIRS:
+        raise HTTPException(status_code=400, detail=f"At most {BACKTEST_MAX_PAIRS} threshold pairs can be evaluated")
+    if not 0 < request.chunk_rows <= BACKTEST_MAX_CHUNK_ROWS:
+        raise HTTPException(status_code=400, detail=f"chunk_rows must be between 1 and {BACKTEST_MAX_CHUNK_ROWS}")
+    if request.attack_frames_per_scenario < 1:
+        raise HTTPException(status_code=400, detail="attack_frames_per_scenario must be at least 1")
+    scenario_count = await scenarios_collection.count_documents(backtest_scenario_query(request))
+    if scenario_count * request.attack_frames_per_scenario > BACKTEST_MAX_ATTACK_FRAMES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BACKTEST_MAX_ATTACK_FRAMES} attack frames can be generated, "
+                   f"{scenario_count} scenarios x {request.attack_frames_per_scenario} requested"
+        )
+    
+    job = {
+        "job_id": str(uuid.uuid4()),
+        "status": BacktestStatus.PENDING,
+        "parameters": request.dict(),
+        "buckets_processed": 0,
+        "buckets_total": None,
+        "rows_processed": 0,
+        "progress": 0.0,
+        "created_at": datetime.utcnow()
+    }
+    await backtests_collection.insert_one(job)
+    background_tasks.add_task(run_backtest, job["job_id"], request)
+    
+    return {"success": True, "job_id": job["job_id"]}
+
+@app.get("/api/ml-config/backtest/{job_id}")
+async def get_backtest(job_id: str):
+    """Get backtest progress and results"""
+    job = await backtests_collection.find_one({"job_id": job_id})
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Backtest not found")
+    
+    job["_id"] = str(job["_id"])
+    for field in ("created_at", "started_at", "completed_at"):
+        if job.get(field):
+            job[field] = job[field].isoformat()
+    return job
 
 # Logs Endpoints
 
@@ -648,7 +1999,9 @@ async def get_logs(limit: int = 100, level: Optional[str] = None):
     if level:
         query["level"] = level
     
-    logs = await logs_collection.find(query).sort("timestamp", -1).limit(limit).to_list(length=limit)
+    logs = hot_logs.recent(limit, lambda log: not level or log["level"] == level)
+    if logs is None:
+        logs = await logs_collection.find(query).sort("timestamp", -1).limit(limit).to_list(length=limit)
     
     for log in logs:
         log["_id"] = str(log["_id"])
@@ -662,12 +2015,28 @@ async def get_logs(limit: int = 100, level: Optional[str] = None):
 async def initiate_recovery():
     """Initiate system recovery"""
     # Resolve all active threats
+    issued_at = datetime.utcnow()
+    resolution = {"resolved": True, "resolved_at": issued_at}
+    held = set(hot_threats.index)
     result = await threats_collection.update_many(
-        {"resolved": False},
-        {"$set": {"resolved": True, "resolved_at": datetime.utcnow()}}
+        {"resolved": False, "detected_at": {"$lte": issued_at}},
+        {"$set": resolution}
     )
     
-    await logs_collection.insert_one({
+    # Threats inserted while the update ran may or may not have been matched
+    arrived = [
+        threat["threat_id"] for threat in hot_threats.entries
+        if threat["threat_id"] not in held and not threat["resolved"] and threat["detected_at"] <= issued_at
+    ]
+    if arrived:
+        async for threat in threats_collection.find({"threat_id": {"$in": arrived}, "resolved": True}):
+            hot_threats.update(threat["threat_id"], {"resolved": True, "resolved_at": threat["resolved_at"]})
+    for threat_id in held:
+        threat = hot_threats.index.get(threat_id)
+        if threat and not threat["resolved"] and threat["detected_at"] <= issued_at:
+            hot_threats.update(threat_id, resolution)
+    
+    await insert_log({
         "log_id": str(uuid.uuid4()),
         "timestamp": datetime.utcnow(),
         "level": "INFO",
@@ -695,6 +2064,13 @@ async def get_metrics():
     data_tampering = await threats_collection.count_documents({"threat_type": ThreatType.DATA_TAMPERING})
     anomalies = await threats_collection.count_documents({"threat_type": ThreatType.ANOMALY_DETECTED})
     
+    # Detection figures come from the latest backtest of the active configuration
+    config = await ml_config_collection.find_one({}) or {}
+    backtest = await find_backtest_result(
+        config.get("anomaly_threshold", detector.threshold),
+        config.get("gps_speed_threshold", 50.0)
+    )
+    
     return {
         "total_threats": total_threats,
         "resolved_threats": resolved_threats,
@@ -705,8 +2081,9 @@ async def get_metrics():
             "data_tampering": data_tampering,
             "anomalies": anomalies
         },
-        "detection_rate": 0.95,  # Simulated
-        "false_positive_rate": 0.05  # Simulated
+        "detection_rate": backtest["recall"] if backtest else None,
+        "false_positive_rate": backtest["false_positive_rate"] if backtest else None,
+        "backtest_id": backtest["job_id"] if backtest else None
     }
 
 # Vehicles Endpoints
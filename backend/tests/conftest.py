@@ -0,0 +1,84 @@
+import asyncio
+import os
+import sys
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncCursor, AsyncMongoMockClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server  # noqa: E402
+
+
+def run(coroutine):
+    """Run a coroutine to completion on a fresh event loop"""
+    return asyncio.run(coroutine)
+
+
+@pytest.fixture
+def mock_db(monkeypatch):
+    """Point every collection at an in-memory database and reset global state"""
+    database = AsyncMongoMockClient()["cyber_defense_test"]
+    # mongomock-motor does not chain batch_size, which has no effect in memory anyway
+    monkeypatch.setattr(AsyncCursor, "batch_size", lambda cursor, size: cursor, raising=False)
+    for name in dir(server):
+        if name.endswith("_collection"):
+            monkeypatch.setattr(server, name, database[getattr(server, name).name])
+
+    monkeypatch.setattr(server, "telemetry_writer", server.TelemetryBucketWriter(
+        bucket_seconds=600, flush_interval=1.0, flush_rows=500, encoding="zlib", compress_min_rows=64,
+        compact_delay=60, max_attempts=3, max_pending_rows=10000
+    ))
+    monkeypatch.setattr(server, "hot_threats", server.HotTier(100, "detected_at", "threat_id"))
+    monkeypatch.setattr(server, "hot_logs", server.HotTier(100, "timestamp", "log_id"))
+    monkeypatch.setattr(server, "admission", server.AdmissionController(8, 4, 16, 8, 2, 1, 4, 8))
+    monkeypatch.setattr(server.detector, "baseline_mean", np.array([50.0, 1013.0, 45.0, 12.5, 2.1]))
+    monkeypatch.setattr(server.detector, "baseline_std", np.array([5.0, 3.0, 5.0, 0.3, 0.1]))
+    monkeypatch.setattr(server.detector, "threshold", 2.5)
+    monkeypatch.setattr(server.detector, "gps_speed_threshold", 50.0)
+    monkeypatch.setattr(server.detector, "previous_gps", {})
+    return database
+
+
+@pytest.fixture
+def client(mock_db, monkeypatch):
+    """Test client with startup and shutdown hooks against the in-memory database"""
+    async def fixed_baseline(normal_data):
+        pass
+
+    monkeypatch.setattr(server.detector, "set_baseline", fixed_baseline)
+    with TestClient(server.app) as test_client:
+        yield test_client
+
+
+def telemetry_frame(vehicle_id="drone-001", speed=15.0, temperature=50.0, checksum=6,
+                    source="GROUND_CONTROL", altitude=120.0):
+    """Telemetry request body that passes every check unless overridden"""
+    return {
+        "vehicle_id": vehicle_id,
+        "gps": {"latitude": 37.77, "longitude": -122.42, "altitude": altitude, "speed": speed},
+        "sensors": {"temperature": temperature, "pressure": 1013.0, "humidity": 45.0, "voltage": 12.5, "current": 2.1},
+        "control": {"commands": [1, 2, 3], "source": source, "checksum": checksum}
+    }
+
+
+def telemetry_row(timestamp, speed=15.0):
+    """One storage row with normal readings"""
+    row = {name: 0 for name in server.TELEMETRY_COLUMNS}
+    row.update({
+        "timestamp": float(timestamp),
+        "gps_latitude": 37.77,
+        "gps_longitude": -122.42,
+        "gps_altitude": 120.0,
+        "gps_speed": speed,
+        "sensor_temperature": 50.0,
+        "sensor_pressure": 1013.0,
+        "sensor_humidity": 45.0,
+        "sensor_voltage": 12.5,
+        "sensor_current": 2.1,
+        "control_command_sum": 6,
+        "control_checksum": 6
+    })
+    return row
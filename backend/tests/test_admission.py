@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+import server
+from conftest import run, telemetry_frame
+
+
+def controller(max_concurrency=1, max_vehicle_concurrency=2, max_queue=4, downsample_depth=2,
+               downsample_keep=2, retry_after=1, max_priority_concurrency=1, max_priority_queue=1):
+    return server.AdmissionController(
+        max_concurrency, max_vehicle_concurrency, max_queue, downsample_depth,
+        downsample_keep, retry_after, max_priority_concurrency, max_priority_queue
+    )
+
+
+async def hold(admission, vehicle_ids, priority=False):
+    """Admit one frame per vehicle and keep them all admitted or queued"""
+    release = asyncio.Event()
+
+    async def frame(vehicle_id):
+        async with admission.admit(vehicle_id, priority):
+            await release.wait()
+
+    tasks = [asyncio.create_task(frame(vehicle_id)) for vehicle_id in vehicle_ids]
+    await asyncio.sleep(0)
+    return release, tasks
+
+
+def test_shed_reasons_in_order():
+    async def scenario():
+        admission = controller()
+        reasons = [admission.shed_reason("a")]
+
+        # One in flight, two queued: the queue is at the downsample depth
+        release, tasks = await hold(admission, ["a", "a", "x"])
+        reasons += [admission.shed_reason("a"), admission.shed_reason("b"), admission.shed_reason("b")]
+
+        # The queue is full
+        more_release, more_tasks = await hold(admission, ["c", "d"])
+        assert admission.normal.queue_depth == admission.normal.max_queue
+        reasons.append(admission.shed_reason("e"))
+
+        release.set()
+        more_release.set()
+        await asyncio.gather(*tasks, *more_tasks)
+        return reasons, admission.counters
+
+    reasons, counters = run(scenario())
+    assert reasons == [None, "vehicle_limit", None, "downsampled", "queue_full"]
+    assert counters["shed_vehicle_limit"] == counters["shed_downsampled"] == counters["shed_queue_full"] == 1
+
+
+def test_downsampling_stops_and_resets_once_the_queue_drains():
+    async def scenario():
+        admission = controller(max_vehicle_concurrency=4)
+        release, tasks = await hold(admission, ["x", "y", "z"])
+        deep = [admission.shed_reason("a") for _ in range(4)]
+        release.set()
+        await asyncio.gather(*tasks)
+        shallow = [admission.shed_reason("a") for _ in range(2)]
+        return deep, shallow, admission.vehicle_frames
+
+    deep, shallow, vehicle_frames = run(scenario())
+    assert deep == [None, "downsampled", None, "downsampled"]
+    assert shallow == [None, None]
+    assert vehicle_frames == {}
+
+
+def test_downsample_tracks_a_bounded_number_of_vehicles(monkeypatch):
+    admission = controller()
+    admission.normal.queue_depth = admission.downsample_depth
+    monkeypatch.setattr(server.AdmissionController, "MAX_TRACKED_VEHICLES", 3)
+
+    for vehicle in range(10):
+        admission.downsample(f"vehicle-{vehicle}")
+
+    assert len(admission.vehicle_frames) <= 3
+
+
+@pytest.mark.parametrize("overrides", [
+    {"downsample_keep": 0},
+    {"max_concurrency": 0},
+    {"max_priority_queue": 0},
+    {"downsample_depth": 5, "max_queue": 4},
+    {"retry_after": -1}
+])
+def test_invalid_settings_are_rejected(overrides):
+    with pytest.raises(ValueError):
+        controller(**overrides)
+
+
+def test_priority_frames_bypass_normal_queue_but_are_capped():
+    async def scenario():
+        admission = controller()
+        release, tasks = await hold(admission, ["a", "b", "c", "d", "e"])
+        assert admission.shed_reason("f") == "queue_full"
+
+        reasons = [admission.shed_reason("f", priority=True)]
+        priority_release, priority_tasks = await hold(admission, ["f", "g"], priority=True)
+        reasons.append(admission.shed_reason("h", priority=True))
+
+        release.set()
+        priority_release.set()
+        await asyncio.gather(*tasks, *priority_tasks)
+        return reasons, admission.counters
+
+    reasons, counters = run(scenario())
+    assert reasons == [None, "priority_queue_full"]
+    assert counters["priority_admitted"] == 2
+    assert counters["shed_priority_queue_full"] == 1
+
+
+def test_overloaded_endpoint_sheds_normal_frames_but_admits_critical_ones(client):
+    server.admission.normal.queue_depth = server.admission.normal.max_queue
+
+    shed = client.post("/api/monitoring/telemetry", json=telemetry_frame())
+    critical = client.post("/api/monitoring/telemetry", json=telemetry_frame(altitude=-1000.0))
+
+    assert shed.status_code == 429
+    assert shed.headers["Retry-After"] == str(server.admission.retry_after)
+    assert shed.json()["detail"]["reason"] == "queue_full"
+    assert critical.status_code == 200
+    assert client.get("/api/monitoring/admission").json()["shed_queue_full"] == 1
+
+
+def test_shed_critical_frames_still_record_their_threats(client):
+    server.admission.priority.queue_depth = server.admission.priority.max_queue
+
+    response = client.post("/api/monitoring/telemetry", json=telemetry_frame(altitude=-1000.0, checksum=0))
+
+    assert response.status_code == 429
+    assert response.json()["detail"] == {"processed": False, "reason": "priority_queue_full", "threats_recorded": 2}
+    threats = client.get("/api/threats").json()["threats"]
+    assert sorted(threat["threat_type"] for threat in threats) == ["CONTROL_HIJACKING", "GPS_SPOOFING"]
+    assert run(server.threats_collection.count_documents({"severity": "CRITICAL"})) == 2
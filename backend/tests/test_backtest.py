@@ -0,0 +1,148 @@
+import numpy as np
+
+import server
+from conftest import telemetry_frame
+
+
+def brute_force_counts(features, anomaly_thresholds, gps_speed_thresholds):
+    """Confusion counts from the full candidate x row broadcast"""
+    max_z = np.concatenate([f["max_z"] for f in features])
+    speed_jump = np.concatenate([f["speed_jump"] for f in features])
+    fixed = np.concatenate([f["fixed"] for f in features])
+    label = np.concatenate([f["label"] for f in features])
+
+    flagged = fixed[None, None, :] \
+        | (max_z[None, None, :] > anomaly_thresholds[:, None, None]) \
+        | (speed_jump[None, None, :] > gps_speed_thresholds[None, :, None])
+    return {
+        "true_positives": (flagged & label).sum(axis=2),
+        "false_positives": (flagged & ~label).sum(axis=2),
+        "false_negatives": (~flagged & label).sum(axis=2),
+        "true_negatives": (~flagged & ~label).sum(axis=2)
+    }
+
+
+def test_evaluate_backtest_chunk_matches_brute_force():
+    rng = np.random.default_rng(7)
+    anomaly_thresholds = np.array([1.0, 2.0, 2.5, 4.0])
+    gps_speed_thresholds = np.array([10.0, 25.0, 50.0])
+    features = []
+    for rows in (300, 1, 57):
+        # Round so that rows land exactly on thresholds too
+        features.append({
+            "max_z": np.round(rng.uniform(0, 5, rows) * 2) / 2,
+            "speed_jump": np.round(rng.uniform(0, 60, rows) / 5) * 5,
+            "fixed": rng.random(rows) < 0.1,
+            "label": rng.random(rows) < 0.3
+        })
+
+    counts = server.evaluate_backtest_chunk(features, anomaly_thresholds, gps_speed_thresholds)
+    expected = brute_force_counts(features, anomaly_thresholds, gps_speed_thresholds)
+
+    for name, values in expected.items():
+        np.testing.assert_array_equal(counts[name], values, err_msg=name)
+
+
+def test_scenario_attack_frames_are_flagged_by_the_detectors(mock_db):
+    scenarios = [
+        {"parameters": {"altitude": -1000, "speed": 500}},
+        {"parameters": {"source": "UNKNOWN_SOURCE", "invalid_checksum": True}},
+        {"parameters": {"sensor_corruption": True}}
+    ]
+
+    for scenario in scenarios:
+        frames = server.scenario_attack_frames(scenario, 100, np.random.default_rng(0))
+        features = server.detector_features(*frames)
+        flagged = features["fixed"] | (features["max_z"] > server.detector.threshold)
+        assert flagged.all(), scenario
+
+
+def test_threshold_sensitive_scenarios_spread_across_the_grid(mock_db):
+    rng = np.random.default_rng(0)
+    drift = server.detector_features(*server.scenario_attack_frames({"parameters": {"deviation_sigma": [1.0, 5.0]}}, 1000, rng))
+    jump = server.detector_features(*server.scenario_attack_frames({"parameters": {"speed_jump": [20.0, 120.0]}}, 1000, rng))
+
+    assert 0.7 < (drift["max_z"] > 1.5).mean() < 1.0
+    assert 0.1 < (drift["max_z"] > 4.0).mean() < 0.4
+    assert (jump["speed_jump"] > 25.0).mean() > 0.9
+    assert 0.1 < (jump["speed_jump"] > 100.0).mean() < 0.3
+    assert not jump["fixed"].any()
+
+
+def test_scenario_without_attack_parameters_produces_no_frames(mock_db):
+    rng = np.random.default_rng(0)
+
+    assert server.scenario_attack_frames({"parameters": {}}, 10, rng) is None
+    assert server.scenario_attack_frames({"parameters": {"source": "GROUND_CONTROL"}}, 10, rng) is None
+    assert server.scenario_attack_frames({"parameters": {"deviation_sigma": [1.0]}}, 10, rng) is None
+
+
+def test_backtest_publishes_metrics_for_active_configuration(client):
+    for speed in (15.0, 16.0, 15.5, 14.5):
+        client.post("/api/monitoring/telemetry", json=telemetry_frame(speed=speed))
+    assert client.get("/api/metrics").json()["detection_rate"] is None
+
+    job_id = client.post("/api/ml-config/backtest", json={"attack_frames_per_scenario": 50}).json()["job_id"]
+    job = client.get(f"/api/ml-config/backtest/{job_id}").json()
+
+    assert job["status"] == server.BacktestStatus.COMPLETED, job.get("error")
+    assert job["rows_processed"] == 4
+    assert [scenario["attack_frames"] for scenario in job["scenarios"]] == [50] * 5
+    assert (job["attack_frames"], job["normal_rows"]) == (250, 4)
+
+    # Threshold-sensitive scenarios make recall depend on both thresholds
+    recall = {(result["anomaly_threshold"], result["gps_speed_threshold"]): result["recall"] for result in job["results"]}
+    assert recall[(1.5, 25.0)] > recall[(4.0, 25.0)] > recall[(4.0, 100.0)]
+
+    metrics = client.get("/api/metrics").json()
+    assert metrics["backtest_id"] == job_id
+    assert metrics["detection_rate"] == recall[(2.5, 50.0)] < 1.0
+    assert metrics["false_positive_rate"] == 0.0
+    assert "precision" not in metrics
+
+    config = client.get("/api/ml-config").json()
+    backtest = client.put("/api/ml-config", json=config).json()["backtest"]
+    assert (backtest["attack_frames"], backtest["normal_rows"]) == (250, 4)
+
+
+def test_backtest_rejects_too_many_threshold_pairs(client):
+    response = client.post("/api/ml-config/backtest", json={
+        "anomaly_thresholds": [float(value) for value in range(100)],
+        "gps_speed_thresholds": [float(value) for value in range(100)]
+    })
+
+    assert response.status_code == 400
+
+
+def test_live_detection_checks_speed_change_against_active_threshold(client):
+    def gps_threats(speed):
+        threats = client.post("/api/monitoring/telemetry", json=telemetry_frame(speed=speed)).json()["threats"]
+        return [threat["details"]["reason"] for threat in threats if threat["threat_type"] == "GPS_SPOOFING"]
+
+    assert gps_threats(15.0) == []
+    assert gps_threats(80.0) == ["Impossible speed change detected"]
+
+    config = client.get("/api/ml-config").json()
+    config["gps_speed_threshold"] = 100.0
+    assert client.put("/api/ml-config", json=config).status_code == 200
+
+    assert gps_threats(170.0) == []
+
+
+def test_attack_frames_are_generated_in_chunks(client):
+    job_id = client.post("/api/ml-config/backtest", json={"attack_frames_per_scenario": 20, "chunk_rows": 7}).json()["job_id"]
+    job = client.get(f"/api/ml-config/backtest/{job_id}").json()
+
+    assert job["status"] == server.BacktestStatus.COMPLETED, job.get("error")
+    attack_frames = sum(scenario["attack_frames"] for scenario in job["scenarios"])
+    assert attack_frames == 20 * len(job["scenarios"])
+    assert {result["true_positives"] + result["false_negatives"] for result in job["results"]} == {attack_frames}
+
+
+def test_backtest_rejects_too_many_attack_frames_in_total(client):
+    scenarios = len(client.get("/api/scenarios").json()["scenarios"])
+    per_scenario = server.BACKTEST_MAX_ATTACK_FRAMES // scenarios + 1
+
+    response = client.post("/api/ml-config/backtest", json={"attack_frames_per_scenario": per_scenario})
+
+    assert response.status_code == 400
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+from conftest import run, telemetry_frame
+
+START = datetime(2026, 1, 1)
+
+
+def document(index, seconds=None):
+    return {"log_id": str(index), "timestamp": START + timedelta(seconds=index if seconds is None else seconds)}
+
+
+def ready_tier(capacity=3):
+    tier = server.HotTier(capacity, "timestamp", "log_id")
+    tier.ready = tier.complete = True
+    return tier
+
+
+def test_recent_serves_from_memory_only_while_complete():
+    tier = ready_tier()
+    for index in range(2):
+        tier.add(document(index))
+
+    assert [entry["log_id"] for entry in tier.recent(5)] == ["1", "0"]
+
+    for index in range(2, 4):
+        tier.add(document(index))
+
+    assert not tier.complete
+    assert [entry["log_id"] for entry in tier.recent(3)] == ["3", "2", "1"]
+    assert tier.recent(4) is None
+    assert tier.recent(1, lambda entry: entry["log_id"] == "0") is None
+
+
+def test_capacity_below_one_is_rejected():
+    with pytest.raises(ValueError):
+        server.HotTier(0, "timestamp", "log_id")
+
+
+def test_recent_returns_copies():
+    tier = ready_tier()
+    tier.add(document(0))
+
+    tier.recent(1)[0]["_id"] = "serialized"
+
+    assert "_id" not in tier.index["0"]
+
+
+def test_recent_falls_through_until_warmed():
+    tier = server.HotTier(3, "timestamp", "log_id")
+    tier.add(document(0))
+
+    assert tier.recent(1) is None
+    assert not tier.covers(START)
+
+
+def test_covers_only_the_held_time_range():
+    tier = ready_tier(capacity=2)
+    for index in range(3):
+        tier.add(document(index))
+
+    assert tier.covers(START + timedelta(seconds=1))
+    assert not tier.covers(START)
+
+
+def test_out_of_order_adds_keep_time_order():
+    tier = ready_tier(capacity=5)
+    for index, seconds in enumerate([0, 3, 1, 2]):
+        tier.add(document(index, seconds))
+
+    assert [entry["timestamp"].second for entry in tier.entries] == [0, 1, 2, 3]
+
+
+def test_documents_are_held_as_mongo_returns_them():
+    normalized = server.normalize_document({
+        "severity": server.SeverityLevel.CRITICAL,
+        "detected_at": datetime(2026, 1, 1, 12, 0, 0, 123456, tzinfo=timezone(timedelta(hours=2))),
+        "details": {"history": [server.ThreatType.GPS_SPOOFING]}
+    })
+
+    assert normalized == {
+        "severity": "CRITICAL",
+        "detected_at": datetime(2026, 1, 1, 10, 0, 0, 123000),
+        "details": {"history": ["GPS_SPOOFING"]}
+    }
+    assert type(normalized["severity"]) is str
+
+
+def test_threats_from_memory_match_threats_from_mongo(client):
+    client.post("/api/monitoring/telemetry", json=telemetry_frame(altitude=-1000.0))
+    client.post("/api/monitoring/telemetry", json=telemetry_frame(checksum=0))
+
+    from_memory = client.get("/api/threats").json()
+    server.hot_threats.ready = False
+    from_mongo = client.get("/api/threats").json()
+
+    assert from_memory["count"] == 2
+    assert from_memory == from_mongo
+
+
+def test_recovery_leaves_threats_detected_after_it_unresolved(client, monkeypatch):
+    future = {
+        "threat_id": "future",
+        "threat_type": server.ThreatType.ANOMALY_DETECTED,
+        "severity": server.SeverityLevel.HIGH,
+        "detected_at": datetime.utcnow() + timedelta(hours=1),
+        "resolved": False
+    }
+    during = dict(future, threat_id="during", detected_at=datetime.utcnow())
+    update_many = server.threats_collection.update_many
+
+    async def insert_during_update(*args, **kwargs):
+        await server.insert_threats([during])
+        return await update_many(*args, **kwargs)
+
+    run(server.insert_threats([future]))
+    monkeypatch.setattr(server.threats_collection, "update_many", insert_during_update)
+
+    assert client.post("/api/recovery/initiate").json()["threats_resolved"] == 1
+
+    async def stored(threat_id):
+        return (await server.threats_collection.find_one({"threat_id": threat_id}))["resolved"]
+
+    assert (run(stored("future")), server.hot_threats.index["future"]["resolved"]) == (False, False)
+    assert (run(stored("during")), server.hot_threats.index["during"]["resolved"]) == (True, True)
@@ -0,0 +1,272 @@
+import json
+import struct
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+import server
+from conftest import run, telemetry_frame, telemetry_row
+
+BUCKET_START = 1_800_000_000 - 1_800_000_000 % 600
+WHOLE_RANGE = (server.EPOCH, server.EPOCH + timedelta(seconds=BUCKET_START + 10 ** 6))
+
+
+def unpack_columns(buffer):
+    header_length, = struct.unpack("<I", buffer[:4])
+    header = json.loads(buffer[4:4 + header_length])
+    base = 4 + header_length
+    return header["rows"], {
+        column["name"]: np.frombuffer(buffer, column["dtype"], column["length"], base + column["offset"])
+        for column in header["columns"]
+    }
+
+
+async def create_bucket_index():
+    await server.telemetry_buckets_collection.create_index(
+        [("vehicle_id", 1), ("bucket_start", 1)], unique=True
+    )
+
+
+async def stored_rows(vehicle_id):
+    columns = await server.load_telemetry_columns(vehicle_id, *WHOLE_RANGE, ["timestamp"])
+    return columns["timestamp"].tolist()
+
+
+def test_pack_columns_round_trips_through_frombuffer():
+    arrays = {
+        "timestamp": np.array([1.5, 2.5, 3.5]),
+        "control_source": np.array([0, -1, 2], dtype="<i1"),
+        "control_checksum": np.array([6, 7, 8], dtype="<i8")
+    }
+
+    rows, unpacked = unpack_columns(server.pack_columns(arrays))
+
+    assert rows == 3
+    for name, values in arrays.items():
+        assert unpacked[name].dtype == values.dtype
+        np.testing.assert_array_equal(unpacked[name], values)
+
+
+def test_decode_bucket_concatenates_segments_and_skips_pending_ones():
+    def segment(segment_id, values, encoding):
+        return {
+            "segment_id": segment_id,
+            "encoding": encoding,
+            "columns": {"gps_speed": server.encode_column(values, "<f8", encoding)}
+        }
+
+    bucket = {"segments": [segment("a", [1.0, 2.0], "zlib"), segment("b", [3.0], "none"), segment("c", [4.0], "none")]}
+
+    decoded = server.decode_bucket(bucket, ["gps_speed"], skip_segments={"b"})
+
+    np.testing.assert_array_equal(decoded["gps_speed"], [1.0, 2.0, 4.0])
+
+
+def test_partial_bulk_failure_retries_only_failed_segments(mock_db, monkeypatch):
+    writer = server.telemetry_writer
+    collection = server.telemetry_buckets_collection
+    bulk_write = collection.bulk_write
+
+    async def first_applied(operations, ordered):
+        await bulk_write(operations[:1], ordered=ordered)
+        raise BulkWriteError({"writeErrors": [{"index": 1, "code": 2, "errmsg": "failed"}]})
+
+    async def scenario():
+        await create_bucket_index()
+        writer.append("a", telemetry_row(BUCKET_START))
+        writer.append("b", telemetry_row(BUCKET_START))
+        monkeypatch.setattr(collection, "bulk_write", first_applied)
+        await writer.flush()
+        assert [buffer["key"][0] for buffer in writer.unconfirmed.values()] == ["b"]
+
+        monkeypatch.setattr(collection, "bulk_write", bulk_write)
+        await writer.flush()
+        assert not writer.unconfirmed
+        return await stored_rows("a"), await stored_rows("b")
+
+    assert run(scenario()) == ([BUCKET_START], [BUCKET_START])
+
+
+def test_retry_after_ambiguous_failure_does_not_duplicate_rows(mock_db, monkeypatch):
+    writer = server.telemetry_writer
+    collection = server.telemetry_buckets_collection
+    bulk_write = collection.bulk_write
+
+    async def applied_then_lost(operations, ordered):
+        await bulk_write(operations, ordered=ordered)
+        raise AutoReconnect("connection lost")
+
+    async def scenario():
+        await create_bucket_index()
+        writer.append("a", telemetry_row(BUCKET_START))
+        monkeypatch.setattr(collection, "bulk_write", applied_then_lost)
+        await writer.flush()
+        monkeypatch.setattr(collection, "bulk_write", bulk_write)
+        await writer.flush()
+        bucket = await collection.find_one({"vehicle_id": "a"})
+        return bucket["count"], len(bucket["segments"]), writer.unconfirmed
+
+    assert run(scenario()) == (1, 1, {})
+
+
+def test_segment_is_dead_lettered_after_max_attempts(mock_db, monkeypatch):
+    writer = server.telemetry_writer
+
+    async def always_fails(operations, ordered):
+        raise BulkWriteError({"writeErrors": [{"index": 0, "code": 10334, "errmsg": "too large"}]})
+
+    async def scenario():
+        monkeypatch.setattr(server.telemetry_buckets_collection, "bulk_write", always_fails)
+        writer.append("a", telemetry_row(BUCKET_START))
+        for _ in range(writer.max_attempts):
+            await writer.flush()
+        return writer.unconfirmed, await server.telemetry_dead_letter_collection.count_documents({})
+
+    assert run(scenario()) == ({}, 1)
+    assert writer.dead_lettered_rows == 1
+
+
+def test_rows_stay_visible_while_a_flush_is_in_flight(mock_db, monkeypatch):
+    writer = server.telemetry_writer
+    collection = server.telemetry_buckets_collection
+    bulk_write = collection.bulk_write
+    seen = {}
+
+    async def observing(operations, ordered):
+        seen["before"] = await stored_rows("a")
+        await bulk_write(operations, ordered=ordered)
+        seen["after"] = await stored_rows("a")
+
+    async def scenario():
+        monkeypatch.setattr(collection, "bulk_write", observing)
+        writer.append("a", telemetry_row(BUCKET_START))
+        await writer.flush()
+
+    run(scenario())
+    assert seen == {"before": [BUCKET_START], "after": [BUCKET_START]}
+
+
+def test_append_drops_rows_beyond_pending_limit(mock_db):
+    writer = server.telemetry_writer
+    writer.max_pending_rows = 2
+
+    for offset in range(3):
+        writer.append("a", telemetry_row(BUCKET_START + offset))
+
+    assert writer.buffered_rows == 2
+    assert writer.dropped_rows == 1
+
+
+@pytest.mark.parametrize("overrides", [
+    {"bucket_seconds": 0},
+    {"flush_interval": 0},
+    {"flush_rows": 0},
+    {"encoding": "lz4"},
+    {"compress_min_rows": -1},
+    {"compact_delay": -1},
+    {"max_attempts": 0},
+    {"max_pending_rows": 0}
+])
+def test_invalid_writer_settings_are_rejected(overrides):
+    settings = dict(bucket_seconds=600, flush_interval=1.0, flush_rows=500, encoding="zlib",
+                    compress_min_rows=64, compact_delay=60, max_attempts=3, max_pending_rows=10000)
+    settings.update(overrides)
+
+    with pytest.raises(ValueError):
+        server.TelemetryBucketWriter(**settings)
+
+
+def test_storage_endpoint_reports_dropped_rows(client):
+    server.telemetry_writer.max_pending_rows = 1
+
+    for speed in (10.0, 11.0):
+        assert client.post("/api/monitoring/telemetry", json=telemetry_frame(speed=speed)).status_code == 200
+
+    stats = client.get("/api/monitoring/storage").json()
+    assert (stats["buffered_rows"], stats["dropped_rows"], stats["dead_lettered_rows"]) == (1, 1, 0)
+
+
+def test_compaction_merges_closed_bucket_into_one_segment(mock_db):
+    writer = server.telemetry_writer
+
+    async def scenario():
+        await create_bucket_index()
+        for offset in (2, 0, 1):
+            writer.append("a", telemetry_row(BUCKET_START + offset))
+            await writer.flush()
+        await writer.compact(server.EPOCH + timedelta(seconds=BUCKET_START + 600 + writer.compact_delay))
+        return await server.telemetry_buckets_collection.find_one({"vehicle_id": "a"})
+
+    bucket = run(scenario())
+    assert bucket["compacted"] is True
+    assert len(bucket["segments"]) == 1
+    assert bucket["segments"][0]["encoding"] == "none"
+    np.testing.assert_array_equal(
+        server.decode_bucket(bucket, ["timestamp"])["timestamp"],
+        [BUCKET_START, BUCKET_START + 1, BUCKET_START + 2]
+    )
+
+
+def test_compaction_skips_buckets_with_unwritten_rows(mock_db):
+    writer = server.telemetry_writer
+
+    async def scenario():
+        await create_bucket_index()
+        writer.append("a", telemetry_row(BUCKET_START))
+        await writer.flush()
+        writer.append("a", telemetry_row(BUCKET_START + 1))
+        await writer.compact(server.EPOCH + timedelta(seconds=BUCKET_START + 10 ** 5))
+        return await server.telemetry_buckets_collection.find_one({"vehicle_id": "a"})
+
+    assert run(scenario())["compacted"] is False
+
+
+def test_legacy_migration_resumes_without_duplicates(mock_db, monkeypatch):
+    writer = server.telemetry_writer
+    legacy = server.legacy_telemetry_collection
+    delete_many = legacy.delete_many
+    start = datetime(2026, 1, 1)
+    documents = [
+        {
+            "data_id": str(index),
+            "vehicle_id": "v0",
+            "timestamp": start + timedelta(seconds=index),
+            "threats_detected": 0,
+            **{key: value for key, value in telemetry_frame(speed=float(index)).items() if key != "vehicle_id"}
+        }
+        for index in range(10)
+    ]
+
+    async def crash(*args, **kwargs):
+        raise RuntimeError("crash")
+
+    async def scenario():
+        await create_bucket_index()
+        await legacy.insert_many(documents + [{"vehicle_id": "broken"}])
+        monkeypatch.setattr(legacy, "delete_many", crash)
+        await writer.migrate_legacy(batch_size=4)
+        assert writer.migrating
+
+        monkeypatch.setattr(legacy, "delete_many", delete_many)
+        await writer.migrate_legacy(batch_size=4)
+        columns = await server.load_telemetry_columns("v0", start, start + timedelta(days=1), ["gps_speed"])
+        return columns["gps_speed"].tolist(), await legacy.count_documents({})
+
+    speeds, remaining = run(scenario())
+    assert speeds == [float(index) for index in range(10)]
+    assert remaining == 1
+    assert not writer.migrating
+
+
+def test_telemetry_endpoint_returns_columns(client):
+    for speed in (10.0, 11.0, 12.0):
+        assert client.post("/api/monitoring/telemetry", json=telemetry_frame(speed=speed)).status_code == 200
+
+    response = client.get("/api/telemetry/drone-001", params={"columns": "gps_speed,control_source"})
+    binary = client.get("/api/telemetry/drone-001", params={"columns": "gps_speed", "format": "binary"})
+
+    assert response.json()["columns"] == {"gps_speed": [10.0, 11.0, 12.0], "control_source": [0, 0, 0]}
+    assert unpack_columns(binary.content)[1]["gps_speed"].tolist() == [10.0, 11.0, 12.0]
+    assert client.get("/api/telemetry/drone-001", params={"columns": "unknown"}).status_code == 400